@@ -0,0 +1,393 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from PyQt5.QtCore import QCoreApplication, QDate, QModelIndex, PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt5.QtSql import QSqlQuery
+from dataObjects import Database, Importer, ItemList, SpendingItem, Category, SpendingItemStore
+from databaseProfiles import PROFILES, DEFAULT_PROFILE
+
+
+CATEGORIES = [
+    # id, name, weight, median cost
+    (1, "Groceries", 30, 35.0),
+    (2, "Restaurant", 12, 25.0),
+    (3, "Fuel", 8, 60.0),
+    (4, "Rent", 1, 900.0),
+    (5, "Utilities", 2, 120.0),
+    (6, "Clothing", 4, 55.0),
+    (7, "Health", 3, 40.0),
+    (8, "Leisure", 8, 30.0),
+    (9, "Travel", 2, 350.0),
+    (10, "Household", 8, 20.0),
+    (11, "Insurance", 1, 200.0),
+    (12, "Gifts", 3, 45.0),
+    (13, "Electronics", 2, 150.0),
+    (14, "Education", 1, 80.0),
+    (15, "Miscellaneous", 6, 15.0)]
+
+MERCHANTS = ["Rewe", "Aldi", "Edeka", "Lidl", "Shell", "Aral", "Amazon", "Ikea", "Bauhaus", "dm", "Rossmann",
+             "Deutsche Bahn", "Lufthansa", "Pizzeria Roma", "Cafe Central", "Kino", "Apotheke", "Stadtwerke",
+             "Allianz", "MediaMarkt", "Saturn", "H&M", "Zara", "Buchhandlung", "Baeckerei"]
+
+WORDS = ["weekly", "shopping", "dinner", "lunch", "birthday", "present", "repair", "monthly", "fee", "ticket",
+         "holiday", "snacks", "coffee", "parking", "refill", "subscription", "spare", "parts", "medicine", "books"]
+
+
+class LedgerGenerator:
+
+    def __init__(self, seed=1, years=10):
+        self.__random = random.Random(seed)
+        self.__end = date(2020, 12, 31)
+        self.__days = 365 * years
+        self.__weights = [c[2] for c in CATEGORIES]
+
+    def categories(self):
+        for c in CATEGORIES:
+            yield Category(c[0], c[1])
+
+    def rows(self, count: int):
+        r = self.__random
+        for i in range(count):
+            catId, name, weight, median = r.choices(CATEGORIES, self.__weights)[0]
+            d = self.__end - timedelta(days=r.randrange(self.__days))
+            cost = round(median * r.lognormvariate(0, 0.6), 2)
+            comment = r.choice(MERCHANTS)
+            if (r.random() < 0.6):
+                comment += " " + " ".join(r.sample(WORDS, r.randint(1, 3)))
+            yield d, cost, catId, comment
+
+    def items(self, count: int):
+        for d, cost, catId, comment in self.rows(count):
+            item = SpendingItem(None, cost, QDate(d.year, d.month, d.day), "", comment)
+            item.setCategoryId(catId)
+            yield item
+
+
+def generateDatabase(fileName: str, count: int, seed=1):
+    if (os.path.exists(fileName)):
+        os.remove(fileName)
+
+    generator = LedgerGenerator(seed)
+    database = Database()
+    database.setProfile("bulk-import")
+    database.createEmptyDatabase(fileName)
+    database.addCategories(generator.categories())
+    database.addSpendingItems(generator.items(count))
+    return database
+
+
+def generateWorkbook(fileName: str, count: int, seed=1):
+    generator = LedgerGenerator(seed)
+
+    if (fileName.endswith(".xls")):
+        import xlwt
+        book = xlwt.Workbook()
+        items = book.add_sheet("items")
+        categories = book.add_sheet("categories")
+        dateStyle = xlwt.easyxf(num_format_str="YYYY-MM-DD")
+        for j, title in enumerate(["date", "cost", "category id", "category", "comment"]):
+            items.write(0, j, title)
+        for i, (d, cost, catId, comment) in enumerate(generator.rows(count), 1):
+            items.write(i, 0, d, dateStyle)
+            items.write(i, 1, cost)
+            items.write(i, 2, catId)
+            items.write(i, 3, CATEGORIES[catId - 1][1])
+            items.write(i, 4, comment)
+        for i, c in enumerate(CATEGORIES):
+            categories.write(i, 0, c[0])
+            categories.write(i, 1, c[1])
+        book.save(fileName)
+    else:
+        import openpyxl
+        book = openpyxl.Workbook(write_only=True)
+        items = book.create_sheet("items")
+        categories = book.create_sheet("categories")
+        items.append(["date", "cost", "category id", "category", "comment"])
+        for d, cost, catId, comment in generator.rows(count):
+            items.append([d, cost, catId, CATEGORIES[catId - 1][1], comment])
+        for c in CATEGORIES:
+            categories.append([c[0], c[1]])
+        book.save(fileName)
+
+
+class Benchmark:
+
+    def __init__(self, repeat=3):
+        self.__repeat = repeat
+        self.__profile = None
+        self.__results = []
+
+    def getResults(self):
+        return self.__results
+
+    def setProfile(self, profile: str):
+        self.__profile = profile
+
+    def addResult(self, result):
+        result["profile"] = self.__profile
+        self.__results.append(result)
+
+    def measure(self, name: str, items: int, function, repeat=None, setup=None):
+        if (repeat is None):
+            repeat = self.__repeat
+
+        seconds = []
+        try:
+            for i in range(repeat):
+                if (setup is not None):
+                    setup()
+                start = time.perf_counter()
+                function()
+                seconds.append(time.perf_counter() - start)
+        except Exception as e:
+            self.addResult({"name": name, "items": items, "error": str(e)})
+            print("%-40s %9d  failed: %s" % (name, items, e), file=sys.stderr)
+            return
+
+        result = {"name": name,
+                  "items": items,
+                  "repeat": repeat,
+                  "seconds": seconds,
+                  "min": min(seconds),
+                  "median": statistics.median(seconds)}
+        self.addResult(result)
+        print("%-40s %9d  %10.4f s" % (name, items, result["median"]), file=sys.stderr)
+
+
+def succeeded(result):
+    if (not result):
+        raise RuntimeError("operation failed")
+
+
+def loadAll(database: Database, itemList: ItemList):
+    database.getSpendingItems(itemList)
+    while (itemList.canFetchMore(QModelIndex())):
+        itemList.fetchMore(QModelIndex())
+
+
+def benchmarkDatabase(bench: Benchmark, database: Database, count: int, fullScanLimit: int):
+    filters = [
+        ("none", lambda: None),
+        ("date", lambda: database.setDateFilter(QDate(2018, 1, 1), QDate(2018, 12, 31))),
+        ("cost", lambda: database.setCostFilter(50, 100)),
+        ("category", lambda: database.setCategoryFilter(3)),
+        ("comment", lambda: database.setCommentFilter("rewe weekly"))]
+
+    itemList = ItemList()
+    for name, apply in filters:
+        database.setDateFilter(None, None)
+        database.setCostFilter(None, None)
+        database.setCategoryFilter(None)
+        database.setCommentFilter(None)
+        apply()
+
+        bench.measure("getSpendingItems[" + name + "] first page", count,
+                      lambda: database.getSpendingItems(itemList))
+        if (count <= fullScanLimit):
+            bench.measure("getSpendingItems[" + name + "] all pages", count,
+                          lambda: loadAll(database, itemList))
+
+    bench.measure("getMonthlyTotal", count, lambda: database.getMonthlyTotal())
+    bench.measure("getMonthPerCategory", count, lambda: database.getMonthPerCategory(2020, 6))
+    if (not database.isReadOnly()):
+        bench.measure("rebuildMonthlyTotals", count, lambda: succeeded(database.rebuildMonthlyTotals()), repeat=1)
+
+
+def benchmarkItemList(bench: Benchmark, database: Database, count: int):
+    store = SpendingItemStore()
+    query = QSqlQuery(database.getConnection())
+    query.setForwardOnly(True)
+    query.exec("SELECT s.id, s.date, s.cost, c.name, s.comment, s.categoryId "
+               "FROM spendingItem as s, category as c WHERE c.id = s.categoryId;")
+    while (query.next()):
+        store.appendQuery(query)
+    query.finish()
+
+    itemList = ItemList()
+    bench.measure("ItemList.setItems", count, lambda: itemList.setItems(store))
+
+    def appendInBatches():
+        itemList.clear()
+        batch = SpendingItemStore()
+        for row in range(len(store)):
+            batch.append(store.getId(row), store.getIsoDate(row), store.getCost(row), store.getCategory(row),
+                         store.getComment(row), store.getCategoryId(row))
+            if (len(batch) >= 1000):
+                itemList.appendItems(batch)
+                batch = SpendingItemStore()
+        itemList.appendItems(batch)
+
+    bench.measure("ItemList.appendItems (1000 row batches)", count, appendInBatches)
+
+    def paintVisibleRows():
+        for row in range(0, min(count, 50000)):
+            for col in range(4):
+                itemList.data(itemList.index(row, col), 0)
+
+    bench.measure("ItemList.data (4 columns, 50k rows)", count, paintVisibleRows)
+
+
+def benchmarkImport(bench: Benchmark, workDir: str, count: int, extension: str, profile=DEFAULT_PROFILE):
+    workbook = os.path.join(workDir, "ledger-" + str(count) + extension)
+    if (not os.path.exists(workbook)):
+        start = time.perf_counter()
+        try:
+            generateWorkbook(workbook, count)
+        except Exception as e:
+            bench.addResult({"name": "Importer.run " + extension, "items": count, "error": str(e)})
+            print("%-40s %9d  skipped: %s" % ("Importer.run " + extension, count, e), file=sys.stderr)
+            return
+        print("generated", workbook, "in %.1f s" % (time.perf_counter() - start), file=sys.stderr)
+
+    target = os.path.join(workDir, "import-" + str(count) + ".db")
+    state = {}
+
+    def setup():
+        if (os.path.exists(target)):
+            os.remove(target)
+        database = Database()
+        database.setProfile(profile)
+        database.createEmptyDatabase(target)
+        state["database"] = database
+
+    def run():
+        importer = Importer(workbook, state["database"])
+        importer.setProfile(profile)
+        importer.open()
+        importer.run()
+        state["database"].close()
+
+    bench.measure("Importer.run " + extension, count, run, repeat=1, setup=setup)
+
+
+def benchmarkWrites(bench: Benchmark, workDir: str, count: int, profile=DEFAULT_PROFILE, batchSize=100):
+    target = os.path.join(workDir, "writes.db")
+    items = list(LedgerGenerator(2).items(count))
+    state = {}
+
+    def setup():
+        if (os.path.exists(target)):
+            os.remove(target)
+        database = Database()
+        database.setProfile(profile)
+        database.createEmptyDatabase(target)
+        database.addCategories(LedgerGenerator().categories())
+        state["database"] = database
+
+    def run():
+        state["database"].addSpendingItems(items, batchSize)
+        state["database"].close()
+
+    bench.measure("addSpendingItems (" + str(batchSize) + " row commits)", count, run, setup=setup)
+
+
+def benchmarkStartup(bench: Benchmark):
+    main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = dict(os.environ)
+    if ("DISPLAY" not in env and "WAYLAND_DISPLAY" not in env):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    def run():
+        output = subprocess.run([sys.executable, main, "--measure-startup", "--quit"], env=env,
+                                capture_output=True, text=True, timeout=60).stderr
+        for line in output.splitlines():
+            if (line.startswith("startup: first paint after")):
+                return float(line.split()[4]) / 1000
+        raise RuntimeError("main.py did not report a first paint")
+
+    seconds = []
+    for i in range(3):
+        seconds.append(run())
+    bench.addResult({"name": "startup to first paint", "items": 0, "repeat": len(seconds),
+                     "seconds": seconds, "min": min(seconds), "median": statistics.median(seconds)})
+    print("%-40s %9d  %10.4f s" % ("startup to first paint", 0, statistics.median(seconds)), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="houseaccount performance benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="ledger sizes to generate (default 10000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the median is reported")
+    parser.add_argument("--import-limit", type=int, default=200000,
+                        help="largest size for which a workbook is generated and imported")
+    parser.add_argument("--full-scan-limit", type=int, default=1000000,
+                        help="largest size for which all pages of a filter are loaded")
+    parser.add_argument("--workbook", choices=[".xlsx", ".xls"], default=".xlsx")
+    parser.add_argument("--profile", dest="profiles", nargs="+", choices=list(PROFILES), default=[DEFAULT_PROFILE],
+                        help="database profiles to measure (default " + DEFAULT_PROFILE + ")")
+    parser.add_argument("--startup", action="store_true", help="also measure main.py startup to first paint")
+    parser.add_argument("--work-dir", help="directory for generated files, default a temporary directory")
+    parser.add_argument("-o", "--output", help="JSON result file, default stdout")
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication(sys.argv[:1])
+    workDir = args.work_dir or tempfile.mkdtemp(prefix="houseaccount-bench-")
+    os.makedirs(workDir, exist_ok=True)
+
+    bench = Benchmark(args.repeat)
+    sqliteVersion = None
+    for count in args.sizes:
+        fileName = os.path.join(workDir, "ledger-" + str(count) + ".db")
+        start = time.perf_counter()
+        database = generateDatabase(fileName, count)
+        print("generated", fileName, "in %.1f s" % (time.perf_counter() - start), file=sys.stderr)
+
+        query = QSqlQuery(database.getConnection())
+        if (query.exec("SELECT sqlite_version();") and query.next()):
+            sqliteVersion = query.value(0)
+        query.finish()
+        database.close()
+
+        for profile in args.profiles:
+            print("profile", profile, file=sys.stderr)
+            bench.setProfile(profile)
+            database = Database()
+            database.setProfile(profile)
+            database.openDatabase(fileName)
+            benchmarkDatabase(bench, database, count, args.full_scan_limit)
+            benchmarkItemList(bench, database, count)
+            database.close()
+
+            if (PROFILES[profile].isReadOnly()):
+                continue
+            benchmarkWrites(bench, workDir, min(count, 20000), profile)
+            if (count <= args.import_limit):
+                benchmarkImport(bench, workDir, count, args.workbook, profile)
+
+    if (args.startup):
+        bench.setProfile(None)
+        benchmarkStartup(bench)
+
+    report = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "qt": QT_VERSION_STR,
+                       "pyqt": PYQT_VERSION_STR,
+                       "sqlite": sqliteVersion,
+                       "sizes": args.sizes,
+                       "profiles": args.profiles,
+                       "repeat": args.repeat,
+                       "workDir": workDir},
+              "results": bench.getResults()}
+
+    if (args.output is None):
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/python3
+
+import argparse
+import csv
+import sys
+
+from PyQt5.QtCore import QCoreApplication, QDate, Qt
+from dataObjects import Database, Importer, CategoryList, ItemList
+from exporter import Exporter, STDOUT
+from databaseProfiles import PROFILES, DEFAULT_PROFILE
+from importSources import CsvSource, createSource
+from timeBuckets import BUCKET_LEVELS
+
+
+def openDatabase(args):
+    database = Database()
+    database.setProfile(args.profile)
+    database.errorOccurred.connect(lambda message: print(message, file=sys.stderr))
+    if (not database.openDatabase(args.database)):
+        sys.exit(1)
+    return database
+
+
+def openOutput(fileName):
+    if (fileName is None or fileName == "-"):
+        return sys.stdout
+    return open(fileName, "w", newline="", encoding="utf-8")
+
+
+def parseDate(text):
+    d = QDate.fromString(text, Qt.ISODate)
+    if (not d.isValid()):
+        raise argparse.ArgumentTypeError("invalid date '" + text + "', expected YYYY-MM-DD")
+    return d
+
+
+def applyFilters(database, args):
+    if (args.date_from is not None or args.date_to is not None):
+        database.setDateFilter(args.date_from, args.date_to)
+    if (args.cost_min is not None or args.cost_max is not None):
+        database.setCostFilter(args.cost_min, args.cost_max)
+    if (args.category is not None):
+        database.setCategoryFilter(args.category)
+    if (args.search is not None):
+        database.setCommentFilter(args.search)
+    database.setSort(args.sort, not args.ascending)
+
+
+def commandImport(args):
+    database = openDatabase(args)
+
+    importer = Importer(args.file, database)
+    importer.setBatchSize(args.batch_size)
+    importer.setDefaultCategory(args.default_category)
+    importer.setIgnoreDuplicates(args.ignore_duplicates)
+    importer.setDebitsOnly(args.debits_only)
+    if (isinstance(importer.getSource(), CsvSource)):
+        importer.setSource(createSource(args.file,
+                                        delimiter=args.delimiter,
+                                        decimal=args.decimal,
+                                        dateFormat=args.date_format,
+                                        columns=dict(args.columns) if args.columns else None,
+                                        hasHeader=not args.no_header,
+                                        encoding=args.encoding))
+    importer.open()
+    importer.run()
+    if (importer.refused):
+        sys.exit(1)
+
+    print("imported", importer.imported, "items from", args.file,
+          "(" + str(importer.skipped), "rows skipped,", importer.duplicates, "duplicates ignored,",
+          importer.credits, "credits dropped)", file=sys.stderr)
+    database.close()
+
+
+def commandExport(args):
+    database = openDatabase(args)
+    applyFilters(database, args)
+
+    exporter = Exporter(args.output, database, args.format)
+    exporter.setLimit(args.limit)
+    if (not exporter.export()):
+        print("export failed", file=sys.stderr)
+        sys.exit(1)
+
+    print(exporter.exported, "items", file=sys.stderr)
+    database.close()
+
+
+def commandMonthly(args):
+    database = openDatabase(args)
+
+    out = openOutput(args.output)
+    writer = csv.writer(out)
+    writer.writerow(["month", "total"])
+    for d, total in database.getMonthlyTotal(args.limit):
+        writer.writerow([d.toString("yyyy-MM"), round(total, 2)])
+    if (out is not sys.stdout):
+        out.close()
+
+    database.close()
+
+
+def commandRollup(args):
+    database = openDatabase(args)
+
+    out = openOutput(args.output)
+    writer = csv.writer(out)
+    writer.writerow([args.level, "total"])
+    for d, total in database.getBucketTotals(args.level, args.date_from, args.date_to):
+        writer.writerow([d.toString(Qt.ISODate), round(total, 2)])
+    if (out is not sys.stdout):
+        out.close()
+
+    database.close()
+
+
+def commandCategories(args):
+    database = openDatabase(args)
+
+    categories = CategoryList()
+    database.getCategories(categories)
+    out = openOutput(args.output)
+    writer = csv.writer(out)
+    writer.writerow(["id", "name"])
+    for i in range(categories.rowCount(None)):
+        c = categories.getItem(i)
+        writer.writerow([c.getId(), c.getName()])
+    if (out is not sys.stdout):
+        out.close()
+
+    database.close()
+
+
+def parseColumn(text):
+    field, sep, column = text.partition("=")
+    if (sep == "" or field not in CsvSource.COLUMN_NAMES):
+        raise argparse.ArgumentTypeError("expected FIELD=COLUMN with FIELD one of " + ", ".join(CsvSource.COLUMN_NAMES))
+    return field, int(column) if column.isdigit() else column
+
+
+def addFilterArguments(parser):
+    parser.add_argument("--from", dest="date_from", type=parseDate, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=parseDate, help="last date (YYYY-MM-DD)")
+    parser.add_argument("--min", dest="cost_min", type=float, help="minimum cost")
+    parser.add_argument("--max", dest="cost_max", type=float, help="maximum cost")
+    parser.add_argument("--category", type=int, help="category id")
+    parser.add_argument("--search", help="comment search text")
+    parser.add_argument("--sort", choices=ItemList.SORT_COLUMNS, default="date", help="sort column (default date)")
+    parser.add_argument("--ascending", action="store_true", help="sort ascending instead of descending")
+
+
+def createParser():
+    parser = argparse.ArgumentParser(description="houseaccount without the GUI")
+    parser.add_argument("-d", "--database", required=True, help="sqlite database file (created if missing)")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help="sqlite connection profile (default " + DEFAULT_PROFILE + ")")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="import an excel workbook or a csv/tsv file")
+    p.add_argument("file")
+    p.add_argument("--batch-size", type=int, default=Database.BULK_BATCH_SIZE, help="rows per transaction")
+    p.add_argument("--ignore-duplicates", action="store_true", help="skip rows that are already in the database")
+    p.add_argument("--default-category", type=int, help="category id for rows without a category")
+    p.add_argument("--debits-only", action="store_true",
+                   help="bank statement signs: negative amounts are spending, positive credits are dropped")
+    p.add_argument("--delimiter", help="csv field delimiter, detected if omitted")
+    p.add_argument("--decimal", choices=[".", ","], help="csv decimal separator, detected per value if omitted")
+    p.add_argument("--date-format", help="csv date format, e.g. dd.MM.yyyy")
+    p.add_argument("--column", dest="columns", type=parseColumn, action="append",
+                   help="csv column mapping FIELD=COLUMN, COLUMN is a header name or a 0-based index")
+    p.add_argument("--no-header", action="store_true", help="the csv file has no header row")
+    p.add_argument("--encoding", default="utf-8-sig", help="csv file encoding")
+    p.set_defaults(func=commandImport)
+
+    p = commands.add_parser("query", help="list items matching the filters")
+    addFilterArguments(p)
+    p.add_argument("--limit", type=int, help="maximum number of items")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="default from the file extension, csv on stdout")
+    p.add_argument("-o", "--output", default=STDOUT, help="output file, default stdout")
+    p.set_defaults(func=commandExport)
+
+    p = commands.add_parser("export", help="write all items matching the filters to a file")
+    addFilterArguments(p)
+    p.add_argument("--format", choices=sorted(Exporter.WRITERS), help="default from the file extension")
+    p.add_argument("-o", "--output", required=True, help="output file")
+    p.set_defaults(func=commandExport, limit=None)
+
+    p = commands.add_parser("monthly", help="total spending per month")
+    p.add_argument("--limit", type=int, default=15, help="number of months")
+    p.add_argument("-o", "--output", help="output file, default stdout")
+    p.set_defaults(func=commandMonthly)
+
+    p = commands.add_parser("rollup", help="total spending per day, week, month, quarter or year")
+    p.add_argument("level", choices=BUCKET_LEVELS)
+    p.add_argument("--from", dest="date_from", type=parseDate, help="first date (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", type=parseDate, help="last date (YYYY-MM-DD)")
+    p.add_argument("-o", "--output", help="output file, default stdout")
+    p.set_defaults(func=commandRollup)
+
+    p = commands.add_parser("categories", help="list categories")
+    p.add_argument("-o", "--output", help="output file, default stdout")
+    p.set_defaults(func=commandCategories)
+
+    p = commands.add_parser("rebuild", help="rebuild the monthly totals table")
+    p.set_defaults(func=lambda args: openDatabase(args).rebuildMonthlyTotals())
+
+    return parser
+
+
+def main(argv=None):
+    app = QCoreApplication(sys.argv[:1])
+    args = createParser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import math
 
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, pyqtSignal
 from PyQt5.QtWidgets import QGraphicsView, \
     QGraphicsScene, \
     QGraphicsEllipseItem, \
@@ -12,9 +12,12 @@ from PyQt5.QtGui import QColor, \
     QLinearGradient, \
     QPen, QKeyEvent
 from dataObjects import Database
+from timeBuckets import BUCKET_LEVELS, bucketEnd, toDate, toQDate
 
 
 class BarDashboardWidget(QGraphicsView):
+    zoomRequested = pyqtSignal(int)
+
     def __init__(self, parent=None):
         super(BarDashboardWidget, self).__init__(parent)
 
@@ -28,15 +31,75 @@ class BarDashboardWidget(QGraphicsView):
         self.__barDistance = 60
 
         self.__values = []
+        self.__bars = []
+        self.__grid = []
+        self.__gridKey = None
+        self.__redLine = None
+        self.__reference = None
+
+        self.__series = []
+        self.__labelFunction = str
+        self.__windowSize = 15
+        self.__offset = 0
 
     def keyPressEvent(self, event: QKeyEvent):
-        if (event.key() == Qt.Key_Plus):
-            print("pressed [+] key")
-        elif (event.key() == Qt.Key_Minus):
-            print("pressed [-] key")
+        key = event.key()
+        if (key == Qt.Key_Plus):
+            self.zoomRequested.emit(1)
+        elif (key == Qt.Key_Minus):
+            self.zoomRequested.emit(-1)
+        elif (key == Qt.Key_Left):
+            self.pan(-1)
+        elif (key == Qt.Key_Right):
+            self.pan(1)
+        elif (key == Qt.Key_PageUp):
+            self.pan(-self.__windowSize)
+        elif (key == Qt.Key_PageDown):
+            self.pan(self.__windowSize)
+        elif (key == Qt.Key_Home):
+            self.pan(-len(self.__series))
+        elif (key == Qt.Key_End):
+            self.pan(len(self.__series))
         else:
             super(BarDashboardWidget, self).keyPressEvent(event)
 
+    def setReferenceValue(self, value):
+        self.__reference = value
+
+    def setSeries(self, series, labelFunction, anchor=None):
+        self.__series = series
+        self.__labelFunction = labelFunction
+
+        last = len(series) - 1
+        if (anchor is not None):
+            while (last > 0 and series[last][0] > anchor):
+                last -= 1
+        self.__offset = self.__clampOffset(last - self.__windowSize + 1)
+        self.__showWindow()
+
+    def pan(self, steps: int):
+        offset = self.__clampOffset(self.__offset + steps)
+        if (offset != self.__offset):
+            self.__offset = offset
+            self.__showWindow()
+
+    def isAtEnd(self):
+        return self.__offset + self.__windowSize >= len(self.__series)
+
+    def getLastVisibleDate(self):
+        if (not self.__series):
+            return None
+        return self.__series[min(self.__offset + self.__windowSize, len(self.__series)) - 1][0]
+
+    def __clampOffset(self, offset: int):
+        return max(0, min(offset, len(self.__series) - self.__windowSize))
+
+    def __showWindow(self):
+        self.clear()
+        for d, total in self.__series[self.__offset:self.__offset + self.__windowSize]:
+            self.addItem(total, self.__labelFunction(d))
+        self.redraw()
+
     def clear(self):
         self.__values.clear()
         self.__max = 10
@@ -47,50 +110,76 @@ class BarDashboardWidget(QGraphicsView):
             self.__max = int(data)
 
     def redraw(self):
-        self.__scene.clear()
-        self.__addGrid()
-
-        xStart = 0
+        width = len(self.__values) * self.__barDistance
+        if (self.__gridKey != (self.__max, width)):
+            self.__addGrid()
 
-        for e in self.__values:
+        for i, e in enumerate(self.__values):
             label = e[0]
             value = e[1]
 
-            height = self.__barHeight * value/self.__max
+            if (i >= len(self.__bars)):
+                bar = QGraphicsRectItem()
+                bar.setBrush(QColor(0, 0, 200))
+                self.__scene.addItem(bar)
+                textItem = self.__scene.addText("", self.font())
+                self.__bars.append([bar, textItem])
 
-            bar = QGraphicsRectItem(xStart, 0, self.__barWidth, -height)
-            bar.setBrush(QColor(0, 0, 200))
-            self.__scene.addItem(bar)
+            bar, textItem = self.__bars[i]
+            xStart = i * self.__barDistance
+            height = self.__barHeight * value/self.__max
 
-            textItem = self.__scene.addText(label, self.font())
+            bar.setRect(xStart, 0, self.__barWidth, -height)
+            textItem.setPlainText(label)
             textItem.setPos(xStart, 10)
 
-            xStart += self.__barDistance
+        while (len(self.__bars) > len(self.__values)):
+            bar, textItem = self.__bars.pop()
+            self.__scene.removeItem(bar)
+            self.__scene.removeItem(textItem)
 
-        height = self.__barHeight * 800/self.__max
-        width = len(self.__values) * self.__barDistance
-        redLine = QGraphicsLineItem(-30, -height, width+30, -height)
-        redLine.setPen(QPen(QColor(240, 0, 0)))
-        self.__scene.addItem(redLine)
+        if (self.__redLine is None):
+            self.__redLine = QGraphicsLineItem()
+            self.__redLine.setPen(QPen(QColor(240, 0, 0)))
+            self.__scene.addItem(self.__redLine)
+        self.__redLine.setVisible(self.__reference is not None)
+        if (self.__reference is not None):
+            height = self.__barHeight * self.__reference/self.__max
+            self.__redLine.setLine(-30, -height, width+30, -height)
 
 
-        self.__scene.setSceneRect(-30, -30, width + 30, -self.__barHeight)
-        #self.setSceneRect(-30, -30, width + 30, -self.__barHeight)
+        self.__scene.setSceneRect(-60, -(self.__barHeight + 30), width + 90, self.__barHeight + 70)
 
     def __addGrid(self):
+        for item in self.__grid:
+            self.__scene.removeItem(item)
+        self.__grid.clear()
+
         w = len(self.__values) * self.__barDistance
         p = QPen(QColor(200, 200, 200))
 
-        for h in range(0, self.__max, 200):
+        for h in range(0, self.__max, self.__gridStep()):
             pxH = self.__barHeight * h / self.__max
             l = QGraphicsLineItem(0, -pxH, w, -pxH)
             l.setPen(p)
+            l.setZValue(-1)
             self.__scene.addItem(l)
 
 
             textItem = self.__scene.addText(str(h) + " €", self.font())
             textItem.setDefaultTextColor(QColor(150, 150, 150))
             textItem.setPos(-50, -(pxH + 20))
+            self.__grid.append(l)
+            self.__grid.append(textItem)
+
+        self.__gridKey = (self.__max, w)
+
+    def __gridStep(self):
+        raw = self.__max / 5
+        magnitude = 10 ** math.floor(math.log10(raw))
+        for factor in (1, 2, 5, 10):
+            if (factor * magnitude >= raw):
+                return max(1, int(factor * magnitude))
 
 
 class PieDashboardWidget(QGraphicsView):
@@ -112,6 +201,7 @@ class PieDashboardWidget(QGraphicsView):
                          QColor(120, 0, 0)]
 
         self.__elements = []
+        self.__slices = []
 
     def addItemBatch(self, items):
         self.__elements = items
@@ -135,25 +225,29 @@ class PieDashboardWidget(QGraphicsView):
         return xOffset, yOffset
 
     def redraw(self):
-        self.__scene.clear()
-
         total = self.__getElementSum()
         startAngle = 0
         for i, element in enumerate(self.__elements):
             elementValue = element[0]
             elementText = element[1]
 
+            if (i >= len(self.__slices)):
+                ellipse = QGraphicsEllipseItem(0, 0, 300, 300)
+                self.__scene.addItem(ellipse)
+                textItem = self.__scene.addText("", self.font())
+                textItem.setZValue(1)
+                self.__slices.append([ellipse, textItem])
+
+            ellipse, textItem = self.__slices[i]
             angle = round(elementValue/total * 16 * 360)
-            ellipse = QGraphicsEllipseItem(0, 0, 300, 300)
 
             ellipse.setStartAngle(startAngle)
             ellipse.setSpanAngle(angle)
             ellipse.setBrush(self.__getColor(i))
-            self.__scene.addItem(ellipse)
 
+            textItem.setVisible(angle > 10*16)
             if (angle > 10*16):
-                f = self.font()
-                textItem = self.__scene.addText(elementText, f)
+                textItem.setPlainText(elementText)
                 x, y = self.__getPenisPos(startAngle, angle, 155)
 
                 xText = 150+x
@@ -168,15 +262,39 @@ class PieDashboardWidget(QGraphicsView):
 
             startAngle += angle
 
+        while (len(self.__slices) > len(self.__elements)):
+            ellipse, textItem = self.__slices.pop()
+            self.__scene.removeItem(ellipse)
+            self.__scene.removeItem(textItem)
+
 
 class DashboardWidget(QWidget):
+    MONTHLY_BUDGET = 800
+    BUDGET_FACTORS = {
+        "day": 12 / 365,
+        "week": 12 * 7 / 365,
+        "month": 1,
+        "quarter": 3,
+        "year": 12}
+    LABELS = {
+        "day": lambda d: d.toString("dd.MM."),
+        "week": lambda d: "W" + str(d.weekNumber()[0]),
+        "month": lambda d: d.toString("MM/yy"),
+        "quarter": lambda d: "Q" + str((d.month() - 1) // 3 + 1) + d.toString(" yy"),
+        "year": lambda d: d.toString("yyyy")}
 
     def __init__(self, database, parent=None):
         super(DashboardWidget, self).__init__(parent)
 
         self.__database = database
+        self.__dirty = True
+        self.__level = "month"
+        self.__series = None
+        self.__currentMonth = None
+        self.__lastMonth = None
 
         self.__barDashboard = BarDashboardWidget()
+        self.__barDashboard.zoomRequested.connect(self.zoom)
         self.__pieDashboardCurrent = PieDashboardWidget()
         self.__pieDashboardLastMon = PieDashboardWidget()
 
@@ -190,23 +308,53 @@ class DashboardWidget(QWidget):
 
         self.setLayout(_lv)
 
-        self.__database.databaseChanged.connect(self.refresh)
-
     def refresh(self):
-        monthlyTotal = self.__database.getMonthlyTotal()
-        self.__barDashboard.clear()
+        if (not self.isVisible()):
+            self.__dirty = True
+            return
+        self.__dirty = False
 
-        for e in reversed(monthlyTotal):
-            d = e[0]
-            t = e[1]
-            self.__barDashboard.addItem(t, d.toString("MMM"))
-        self.__barDashboard.redraw()
+        series = self.__database.getBucketTotals(self.__level)
+        if (series != self.__series):
+            anchor = None if self.__barDashboard.isAtEnd() else self.__barDashboard.getLastVisibleDate()
+            self.__showSeries(series, anchor)
 
         today = QDate.currentDate()
         currentMonth = self.__database.getMonthPerCategory(today.year(), today.month())
-        self.__pieDashboardCurrent.addItemBatch(currentMonth)
-        self.__pieDashboardCurrent.redraw()
+        if (currentMonth != self.__currentMonth):
+            self.__currentMonth = currentMonth
+            self.__pieDashboardCurrent.addItemBatch(currentMonth)
+            self.__pieDashboardCurrent.redraw()
 
         lastMonth = self.__database.getMonthPerCategory(today.addMonths(-1).year() , today.addMonths(-1).month())
-        self.__pieDashboardLastMon.addItemBatch(lastMonth)
-        self.__pieDashboardLastMon.redraw()
+        if (lastMonth != self.__lastMonth):
+            self.__lastMonth = lastMonth
+            self.__pieDashboardLastMon.addItemBatch(lastMonth)
+            self.__pieDashboardLastMon.redraw()
+
+    def getLevel(self):
+        return self.__level
+
+    def zoom(self, step: int):
+        index = min(max(BUCKET_LEVELS.index(self.__level) - step, 0), len(BUCKET_LEVELS) - 1)
+        if (BUCKET_LEVELS[index] == self.__level):
+            return
+
+        # keep the last visible bucket in view, the new level's series comes from the database's cache
+        anchor = None
+        if (not self.__barDashboard.isAtEnd()):
+            last = self.__barDashboard.getLastVisibleDate()
+            anchor = toQDate(bucketEnd(toDate(last), self.__level))
+
+        self.__level = BUCKET_LEVELS[index]
+        self.__showSeries(self.__database.getBucketTotals(self.__level), anchor)
+
+    def __showSeries(self, series, anchor):
+        self.__series = series
+        self.__barDashboard.setReferenceValue(self.MONTHLY_BUDGET * self.BUDGET_FACTORS[self.__level])
+        self.__barDashboard.setSeries(series, self.LABELS[self.__level], anchor)
+
+    def showEvent(self, event):
+        super(DashboardWidget, self).showEvent(event)
+        if (self.__dirty):
+            self.refresh()
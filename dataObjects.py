@@ -1,8 +1,16 @@
+import sys
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, Counter
 from datetime import date
 from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QDate, QObject, pyqtSignal, QThread
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery, QSql
-from PyQt5.QtWidgets import QErrorMessage
-import xlrd
+from databaseProfiles import PROFILES, DEFAULT_PROFILE
+from databaseSchema import SchemaMigrator, REBUILD_MONTHLY_TOTAL, hasTable
+from diagnostics import queryLog, instrumented
+from importSources import ImportSource, createSource
+from queryBuilder import SpendingItemFilter, SpendingItemQueryBuilder, PreparedQueryCache
+from timeBuckets import BUCKET_LEVELS, BucketSeries, nextBucket, toDate
 
 
 class Importer(QObject):
@@ -13,94 +21,164 @@ class Importer(QObject):
         super(Importer, self).__init__(parent)
         self.stop = False
         self.tickCounter = 0
-
-        self.__fileName = fileName
-        self.__itemSheetIndex = 0
-        self.__categorySheetIndex = 1
-        self.__itemColumnIndex = {
-            'date': 0,
-            'cost': 1,
-            'cat_id': 2,
-            'cat_text': 3,
-            'comment': 4}
-        self.__catColumnIndex = {
-            'cat_id': 0,
-            'cat_text': 1}
+        self.__tickInterval = 100
+        self.__batchSize = Database.BULK_BATCH_SIZE
+        self.__categoryIds = None
+        self.__categoryNames = None
+        self.__defaultCategory = None
+        self.__ignoreDuplicates = False
+        self.__debitsOnly = False
+        self.__fingerprints = None
+        self.__profile = "bulk-import"
+        self.refused = False
+        self.imported = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.credits = 0
+
+        self.__source = createSource(fileName)
         self.__isOpen = False
 
         self.__db = db
 
-        self.__book = None
-        self.__sheetItems = None
-        self.__sheetCategories = None
+    def setSource(self, source: ImportSource):
+        self.__source = source
+        self.__isOpen = False
+
+    def getSource(self):
+        return self.__source
 
     def open(self):
         if (not self.__isOpen):
-            self.__book = xlrd.open_workbook(self.__fileName, encoding_override="utf-8")
-            self.__sheetItems = self.__book.sheet_by_index(self.__itemSheetIndex)
-            self.__sheetCategories = self.__book.sheet_by_index(self.__categorySheetIndex)
-            self.__isOpen = True
+            self.__isOpen = self.__source.open()
 
     def getNumberOfItems(self):
         if (self.__isOpen):
-            return self.__sheetItems.nrows + self.__sheetCategories.nrows
+            return self.__source.getNumberOfItems()
         else:
             return 0
 
-    def __dateFromExcelValue(self, excelValue, datemode):
-        if (excelValue == ""):
-            return date(1990,1,1)
-        year, month, day, hour, minute, second = xlrd.xldate_as_tuple(excelValue, datemode)
-        return QDate(year, month, day)
+    def setCategories(self, categories):
+        self.__categoryIds = categories.getIds()
+        self.__categoryNames = categories.getNameMap()
 
-    def loadCategories(self):
-        for i in range(0, self.__sheetCategories.nrows):
-            id = int(self.__sheetCategories.cell(i, self.__catColumnIndex['cat_id']).value)
-            text = self.__sheetCategories.cell(i, self.__catColumnIndex['cat_text']).value
+    def setDefaultCategory(self, categoryId):
+        self.__defaultCategory = categoryId
 
-            if (text != ""):
-                cat = Category(id, text)
-                self.__db.addCategory(cat)
+    def setIgnoreDuplicates(self, ignore: bool):
+        self.__ignoreDuplicates = ignore
+
+    def setDebitsOnly(self, debitsOnly: bool):
+        self.__debitsOnly = debitsOnly
+
+    def setProfile(self, name):
+        self.__profile = name
+
+    def loadCategories(self):
+        if (self.__categoryIds is None):
+            categories = CategoryList()
+            self.__db.getCategories(categories)
+            self.__categoryIds = categories.getIds()
+            self.__categoryNames = categories.getNameMap()
+
+        self.__db.addCategories(self.__readCategories(), self.__batchSize, False)
+
+    def __readCategories(self):
+        for record in self.__source.readCategories():
+            if (record is not None):
+                id, text = record
+                self.__categoryIds.add(id)
+                self.__categoryNames[text] = id
+                yield Category(id, text)
 
             self.ticker()
             if (self.stop):
                 break
 
     def loadItems(self):
-        for i in range(1, self.__sheetItems.nrows):
-            dVal = self.__sheetItems.cell(i, self.__itemColumnIndex['date']).value
-            cost = self.__sheetItems.cell(i, self.__itemColumnIndex['cost']).value
-            catId = self.__sheetItems.cell(i, self.__itemColumnIndex['cat_id']).value
-            comment = self.__sheetItems.cell(i, self.__itemColumnIndex['comment']).value
-
-            if (cost != "" and dVal != ""):
-                print("->:", dVal, cost, catId, comment, end="")
-                d = self.__dateFromExcelValue(dVal, self.__book.datemode)
-                catId = int(catId)
-                cat = Category(catId, 'dummy')
-                if (cat != None):
-                    print(" adding...", end="")
-                    item = SpendingItem(None, cost, d, cat, comment)
+        if (self.__ignoreDuplicates):
+            self.__fingerprints = self.__db.getSpendingItemFingerprints()
+        self.imported = self.__db.addSpendingItems(self.__readItems(), self.__batchSize, False)
+        self.__fingerprints = None
+
+    def __isDuplicate(self, item):
+        if (self.__fingerprints is None):
+            return False
+
+        # hash the values as they will be stored, so they match what getSpendingItemFingerprints reads back
+        key = Database.fingerprint(item.getDate().toString(Qt.ISODate), item.getCost(), item.getCategoryId(),
+                                   item.getComment())
+        if (self.__fingerprints[key] > 0):
+            self.__fingerprints[key] -= 1
+            return True
+        return False
+
+    def __resolveCategory(self, catId, catName):
+        if (catId is not None and catId in self.__categoryIds):
+            return catId
+        if (catId is None and catName is not None and catName in self.__categoryNames):
+            return self.__categoryNames[catName]
+        if (catId is None and catName is None):
+            return self.__defaultCategory
+        return None
+
+    def __readItems(self):
+        for record in self.__source.readItems():
+            if (record is not None):
+                d, cost, catId, catName, comment = record
+                if (self.__debitsOnly):
+                    cost = -cost
+                catId = self.__resolveCategory(catId, catName) if cost >= 0 else None
+                if (cost < 0):
+                    self.credits += 1
+                elif (catId is not None):
+                    item = SpendingItem(None, cost, d, 'dummy', comment)
                     item.setCategoryId(catId)
-                    self.__db.addSpendingItem(item, False)
-                print()
+                    if (self.__isDuplicate(item)):
+                        self.duplicates += 1
+                    else:
+                        yield item
+                else:
+                    self.skipped += 1
 
             self.ticker()
             if (self.stop):
                 break
 
-        self.__db.databaseChanged.emit()
+    def setBatchSize(self, batchSize: int):
+        self.__batchSize = max(1, batchSize)
 
     def ticker(self):
         self.tickCounter += 1
-        self.tick.emit(self.tickCounter)
+        if (self.tickCounter % self.__tickInterval == 0):
+            self.tick.emit(self.tickCounter)
 
     def cancel(self):
         self.stop = True
 
     def run(self):
-        self.loadCategories()
-        self.loadItems()
+        if (self.__db.isReadOnly()):
+            print("the database profile", self.__db.getProfile(), "is read-only, import refused")
+            self.refused = True
+            self.__source.close()
+            self.__isOpen = False
+            self.finished.emit()
+            return
+
+        previous = self.__db.getProfile()
+        if (self.__profile is not None):
+            self.__db.setProfile(self.__profile)
+        try:
+            self.loadCategories()
+            self.loadItems()
+        finally:
+            if (self.__profile is not None):
+                self.__db.setProfile(previous)
+        self.__source.close()
+        self.__isOpen = False
+        self.tick.emit(self.tickCounter)
+        self.__db.categoriesChanged.emit()
+        self.__db.databaseChanged.emit()
         self.finished.emit()
 
 
@@ -134,6 +212,8 @@ class SpendingItem:
         self.__category = category
         self.__comment = comment
         self.__date = d
+        self.__rawDate = None
+        self.__hasRawDate = False
         self.__id = id
         self.__catId = None
 
@@ -155,9 +235,21 @@ class SpendingItem:
     def getId(self):
         return self.__id
 
+    def setId(self, id: int):
+        self.__id = id
+
     def getDate(self):
         return self.__date
 
+    def getRawDate(self):
+        if (self.__hasRawDate):
+            return self.__rawDate
+        return self.__date.toString(Qt.ISODate)
+
+    def setRawDate(self, rawDate):
+        self.__rawDate = rawDate
+        self.__hasRawDate = True
+
     def getCost(self):
         return self.__cost
 
@@ -169,6 +261,8 @@ class SpendingItem:
 
     def setDate(self, d: QDate):
         self.__date = d
+        self.__rawDate = None
+        self.__hasRawDate = False
 
     def setCost(self, cost: float):
         if (cost >= 0):
@@ -188,8 +282,10 @@ class SqlSpendingItem(SpendingItem):
         self.__cost = query.value("cost")
         self.__date = QDate.fromString(query.value("date"), Qt.ISODate)
         self.__category = query.value("catName")
-        self.__comment = query.value("comment")
+        self.__comment = None if query.isNull("comment") else query.value("comment")
         super(SqlSpendingItem, self).__init__(self.__id, self.__cost, self.__date, self.__category, self.__comment)
+        self.setCategoryId(query.value("catId"))
+        self.setRawDate(None if query.isNull("date") else query.value("date"))
 
 
 class CategoryList(QAbstractTableModel):
@@ -198,6 +294,8 @@ class CategoryList(QAbstractTableModel):
         super(CategoryList, self).__init__(parent)
 
         self.__categoryList = []
+        self.__rowById = {}
+        self.__byName = {}
 
     def rowCount(self, parent: QModelIndex):
         return len(self.__categoryList)
@@ -221,8 +319,24 @@ class CategoryList(QAbstractTableModel):
             return None
 
     def addItem(self, c: Category):
+        row = len(self.__categoryList)
+        self.beginInsertRows(QModelIndex(), row, row)
         self.__categoryList.append(c)
-        self.layoutChanged.emit()
+        self.__index(row, c)
+        self.endInsertRows()
+
+    def setItems(self, categories):
+        self.beginResetModel()
+        self.__categoryList = list(categories)
+        self.__rowById = {}
+        self.__byName = {}
+        for row, c in enumerate(self.__categoryList):
+            self.__index(row, c)
+        self.endResetModel()
+
+    def __index(self, row: int, c: Category):
+        self.__rowById[c.getId()] = row
+        self.__byName[c.getName()] = c
 
     def __getItem(self, index: int):
         if (index >= 0 and index < len(self.__categoryList)):
@@ -231,57 +345,398 @@ class CategoryList(QAbstractTableModel):
             return None
 
     def findRowIndexOfCategoryId(self, catId: int):
-        for index, e in enumerate(self.__categoryList):
-            if (e.getId() == catId):
-                return index
-        return -1
+        return self.__rowById.get(catId, -1)
 
     def findCategory(self, id: int):
-        for e in self.__categoryList:
-            if (e.getId() == id):
-                return e
+        return self.__getItem(self.__rowById.get(id, -1))
+
+    def findCategoryByName(self, name: str):
+        return self.__byName.get(name)
+
+    def getName(self, id: int):
+        c = self.findCategory(id)
+        if (c != None):
+            return c.getName()
         return None
 
+    def hasCategoryId(self, id: int):
+        return id in self.__rowById
+
+    def getNameMap(self):
+        return dict((name, c.getId()) for name, c in self.__byName.items())
+
+    def getIds(self):
+        return set(self.__rowById.keys())
+
     def getItem(self, index: int):
         return self.__getItem(index)
 
     def clear(self):
-        self.__categoryList.clear()
-        self.layoutChanged.emit()
+        self.setItems([])
+
+
+class SpendingItemStore:
+    MAX_INDEX_EDITS = 64
+
+    def __init__(self):
+        self.__ids = array('q')
+        self.__dates = array('i')
+        self.__costs = array('d')
+        self.__categories = array('q')
+        self.__comments = []
+
+        self.__categoryNames = {}
+        # date column values that are not plain YYYY-MM-DD, keyed by id, so paging can resume from the stored value
+        self.__rawDates = {}
+
+        # id -> row as of the last index build, plus the inserts and removals since, replayed on lookup
+        self.__rowOfId = None
+        self.__edits = []
+
+    @staticmethod
+    def fromItems(items):
+        store = SpendingItemStore()
+        for item in items:
+            store.appendItem(item)
+        return store
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __dateOrdinal(self, isoDate):
+        try:
+            return date.fromisoformat(isoDate[:10]).toordinal()
+        except (TypeError, ValueError):
+            return 0
+
+    def __copyRawDate(self, other, otherRow):
+        id = other.__ids[otherRow]
+        if (id in other.__rawDates):
+            self.__rawDates[id] = other.__rawDates[id]
+        else:
+            self.__rawDates.pop(id, None)
+
+    def append(self, id: int, isoDate: str, cost: float, category: str, comment: str, categoryId=None):
+        if (categoryId is None):
+            categoryId = -1
+        ordinal = self.__dateOrdinal(isoDate)
+        if (ordinal == 0 or len(isoDate) != 10 or isoDate[4] != "-" or isoDate[7] != "-"):
+            self.__rawDates[id] = isoDate
+        self.__ids.append(id)
+        self.__dates.append(ordinal)
+        self.__costs.append(cost)
+        self.__categories.append(categoryId)
+        self.__categoryNames[categoryId] = category
+        if (isinstance(comment, str)):
+            comment = sys.intern(comment)
+        self.__comments.append(comment)
+        if (self.__rowOfId is not None):
+            self.__indexTail(len(self.__ids) - 1)
+
+    def appendItem(self, item: SpendingItem):
+        self.append(item.getId(), item.getRawDate(), item.getCost(), item.getCategory(),
+                    item.getComment(), item.getCategoryId())
+
+    def appendQuery(self, query: QSqlQuery):
+        isoDate = query.value(1)
+        if (isoDate == "" and query.isNull(1)):
+            isoDate = None
+        comment = query.value(4)
+        if (comment == "" and query.isNull(4)):
+            comment = None
+        self.append(query.value(0), isoDate, query.value(2), query.value(3), comment, query.value(5))
+
+    def extend(self, other):
+        first = len(self.__ids)
+        self.__ids.extend(other.__ids)
+        self.__dates.extend(other.__dates)
+        self.__costs.extend(other.__costs)
+        self.__categories.extend(other.__categories)
+        self.__comments.extend(other.__comments)
+        self.__categoryNames.update(other.__categoryNames)
+        self.__rawDates.update(other.__rawDates)
+        self.__indexTail(first)
+
+    def insertRow(self, row: int, other, otherRow=0):
+        self.__ids.insert(row, other.__ids[otherRow])
+        self.__dates.insert(row, other.__dates[otherRow])
+        self.__costs.insert(row, other.__costs[otherRow])
+        self.__categories.insert(row, other.__categories[otherRow])
+        self.__comments.insert(row, other.__comments[otherRow])
+        self.__categoryNames.update(other.__categoryNames)
+        self.__copyRawDate(other, otherRow)
+        self.__addEdit(row, 1, self.__ids[row])
+
+    def setRow(self, row: int, other, otherRow=0):
+        oldId = self.__ids[row]
+        self.__ids[row] = other.__ids[otherRow]
+        self.__dates[row] = other.__dates[otherRow]
+        self.__costs[row] = other.__costs[otherRow]
+        self.__categories[row] = other.__categories[otherRow]
+        self.__comments[row] = other.__comments[otherRow]
+        self.__categoryNames.update(other.__categoryNames)
+        self.__copyRawDate(other, otherRow)
+        if (oldId != self.__ids[row]):
+            self.__rawDates.pop(oldId, None)
+            self.__addEdit(row, -1, oldId)
+            self.__addEdit(row, 1, self.__ids[row])
+
+    def removeRow(self, row: int):
+        self.removeRows(row, 1)
+
+    def removeRows(self, row: int, count: int):
+        for id in self.__ids[row:row + count]:
+            self.__rawDates.pop(id, None)
+        del self.__ids[row:row + count]
+        del self.__dates[row:row + count]
+        del self.__costs[row:row + count]
+        del self.__categories[row:row + count]
+        del self.__comments[row:row + count]
+        self.__addEdit(row, -count, None)
+
+    def removeRanges(self, ranges):
+        keep = []
+        start = 0
+        for row, count in sorted(ranges):
+            keep.append((start, row))
+            start = row + count
+        keep.append((start, len(self.__ids)))
+
+        # one compacting pass instead of shifting the tail once per range
+        for row, count in ranges:
+            for id in self.__ids[row:row + count]:
+                self.__rawDates.pop(id, None)
+        self.__ids = self.__compact(self.__ids, keep)
+        self.__dates = self.__compact(self.__dates, keep)
+        self.__costs = self.__compact(self.__costs, keep)
+        self.__categories = self.__compact(self.__categories, keep)
+        self.__comments = self.__compact(self.__comments, keep)
+        self.__rowOfId = None
+        self.__edits = []
+
+    @staticmethod
+    def __compact(column, keep):
+        compacted = column[:0]
+        for first, last in keep:
+            compacted.extend(column[first:last])
+        return compacted
+
+    def __indexTail(self, first: int):
+        if (self.__rowOfId is None):
+            return
+        if (self.__edits):
+            self.__rowOfId = None
+            return
+        for row in range(first, len(self.__ids)):
+            self.__rowOfId[self.__ids[row]] = row
+
+    def __addEdit(self, row: int, delta: int, id):
+        if (self.__rowOfId is not None):
+            self.__edits.append((row, delta, id))
+            if (len(self.__edits) > self.MAX_INDEX_EDITS):
+                self.__rowOfId = None
+
+    def __buildIndex(self):
+        self.__rowOfId = dict(zip(self.__ids, range(len(self.__ids))))
+        self.__edits = []
+
+    def findId(self, id: int):
+        if (self.__rowOfId is None):
+            self.__buildIndex()
+
+        row = self.__rowOfId.get(id)
+        for editRow, delta, editId in self.__edits:
+            if (delta > 0 and editId == id):
+                row = editRow
+            elif (row is None):
+                continue
+            elif (delta > 0 and row >= editRow):
+                row += delta
+            elif (delta < 0 and row >= editRow):
+                row = row + delta if row >= editRow - delta else None
+
+        if (row is None or row >= len(self.__ids) or self.__ids[row] != id):
+            return -1
+        return row
+
+    def getSortKey(self, row: int, column: str):
+        id = self.__ids[row]
+        if (column == "cost"):
+            return (self.__costs[row], id)
+        elif (column == "category"):
+            return (self.getCategory(row) or "", self.__categories[row], id)
+        elif (column == "comment"):
+            # NULL comments sort before every text, as they do in SQLite
+            comment = self.__comments[row]
+            return (comment is not None, comment or "", id)
+        return (self.__dates[row], id)
+
+    def findSortedRow(self, key, column: str, descending: bool):
+        lo = 0
+        hi = len(self.__ids)
+        while (lo < hi):
+            mid = (lo + hi) // 2
+            midKey = self.getSortKey(mid, column)
+            if ((midKey > key) if descending else (midKey < key)):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def clear(self):
+        self.__init__()
+
+    def getId(self, row: int):
+        return self.__ids[row]
+
+    def getDateOrdinal(self, row: int):
+        return self.__dates[row]
+
+    def getDate(self, row: int):
+        o = self.__dates[row]
+        if (o <= 0):
+            return QDate()
+        d = date.fromordinal(o)
+        return QDate(d.year, d.month, d.day)
+
+    def getIsoDate(self, row: int):
+        o = self.__dates[row]
+        if (o <= 0):
+            return ""
+        return date.fromordinal(o).isoformat()
+
+    def getRawDate(self, row: int):
+        id = self.__ids[row]
+        if (id in self.__rawDates):
+            return self.__rawDates[id]
+        return self.getIsoDate(row)
+
+    def getCost(self, row: int):
+        return self.__costs[row]
+
+    def getCategoryId(self, row: int):
+        return self.__categories[row]
+
+    def getCategory(self, row: int):
+        return self.__categoryNames.get(self.__categories[row])
+
+    def getComment(self, row: int):
+        return self.__comments[row]
+
+    def getItem(self, row: int):
+        item = SpendingItem(self.__ids[row], self.__costs[row], self.getDate(row), self.getCategory(row), self.__comments[row])
+        item.setCategoryId(self.__categories[row])
+        if (self.__ids[row] in self.__rawDates):
+            item.setRawDate(self.__rawDates[self.__ids[row]])
+        return item
 
 
 class ItemList(QAbstractTableModel):
+    sortChanged = pyqtSignal(str, bool)
+
+    PAGE_SIZE = 500
+    CELL_CACHE_SIZE = 4096
+    MAX_REMOVE_RANGES = 16
+    SortRole = Qt.UserRole
+    SORT_COLUMNS = ["date", "cost", "category", "comment"]
+
+    __alignments = [int(Qt.AlignLeft | Qt.AlignVCenter),
+                    int(Qt.AlignRight | Qt.AlignVCenter),
+                    int(Qt.AlignLeft | Qt.AlignVCenter),
+                    int(Qt.AlignLeft | Qt.AlignVCenter)]
 
     def __init__(self, parent=None):
         super(ItemList, self).__init__(parent)
 
-        self.__dataList = []
+        self.__store = SpendingItemStore()
+        self.__cellCache = OrderedDict()
+        self.__categories = None
+        self.__source = None
+        self.__hasMore = False
+        self.__fetching = False
+        self.__replacePending = False
+        self.__sortColumn = "date"
+        self.__sortDescending = True
 
     def rowCount(self, parent: QModelIndex):
-        return len(self.__dataList)
+        return len(self.__store)
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        if (column < 0 or column >= len(self.SORT_COLUMNS)):
+            return
+
+        sortColumn = self.SORT_COLUMNS[column]
+        descending = order == Qt.DescendingOrder
+        if (sortColumn == self.__sortColumn and descending == self.__sortDescending):
+            return
+
+        self.__sortColumn = sortColumn
+        self.__sortDescending = descending
+        self.sortChanged.emit(sortColumn, descending)
+
+    def getSortColumn(self):
+        return self.__sortColumn
+
+    def isSortDescending(self):
+        return self.__sortDescending
 
     def columnCount(self, parent: QModelIndex):
         return 4
 
     def data(self, index: QModelIndex, role):
+        col = index.column()
+        row = index.row()
+        if (row < 0 or row >= len(self.__store) or col < 0 or col > 3):
+            return None
+
         if (role == Qt.DisplayRole):
-            col = index.column()
-            row = index.row()
-            item: SpendingItem = self.getItem(row)
-            if (item != None):
+            if (col == 2):
+                return self.__getCategoryName(row)
+            elif (col == 3):
+                return self.__store.getComment(row)
+
+            key = (row, col)
+            text = self.__cellCache.get(key)
+            if (text is None):
                 if (col == 0):
-                    return item.getDate().toString(Qt.ISODate)
-                elif (col == 1):
-                    return str(item.getCost()) + " €"
-                elif (col == 2):
-                    return item.getCategory()
-                elif (col == 3):
-                    return item.getComment()
+                    text = self.__store.getIsoDate(row)
                 else:
-                    return ""
+                    text = str(self.__store.getCost(row)) + " €"
+                self.__cellCache[key] = text
+                if (len(self.__cellCache) > self.CELL_CACHE_SIZE):
+                    self.__cellCache.popitem(last=False)
+            else:
+                self.__cellCache.move_to_end(key)
+            return text
+        elif (role == Qt.TextAlignmentRole):
+            return self.__alignments[col]
+        elif (role == self.SortRole):
+            if (col == 0):
+                return self.__store.getDateOrdinal(row)
+            elif (col == 1):
+                return self.__store.getCost(row)
+            elif (col == 2):
+                return self.__getCategoryName(row)
+            else:
+                return self.__store.getComment(row)
         else:
             return None
 
+    def __getCategoryName(self, row: int):
+        if (self.__categories is not None):
+            name = self.__categories.getName(self.__store.getCategoryId(row))
+            if (name is not None):
+                return name
+        return self.__store.getCategory(row)
+
+    def setCategories(self, categories: CategoryList):
+        self.__categories = categories
+        categories.modelReset.connect(self.__categoriesChanged)
+
+    def __categoriesChanged(self):
+        if (len(self.__store) > 0):
+            self.dataChanged.emit(self.index(0, 2), self.index(len(self.__store) - 1, 2))
+
     def headerData(self, section, orientation, role):
         headers = ['Date', 'Cost', 'Category', 'Comment']
 
@@ -295,26 +750,182 @@ class ItemList(QAbstractTableModel):
                 return str(section+1)
 
     def getItem(self, index: int):
-        if (index >= 0 and index < len(self.__dataList)):
-            return self.__dataList[index]
+        if (index >= 0 and index < len(self.__store)):
+            return self.__store.getItem(index)
         else:
             return None
 
+    def getStore(self):
+        return self.__store
+
     def addItem(self, item: SpendingItem):
-        self.__dataList.append(item)
-        self.layoutChanged.emit()
+        self.appendItems([item])
+
+    def appendItems(self, items):
+        if (not isinstance(items, SpendingItemStore)):
+            items = SpendingItemStore.fromItems(items)
+        if (len(items) == 0):
+            return
+
+        first = len(self.__store)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self.__store.extend(items)
+        self.endInsertRows()
+
+    def setItems(self, items):
+        if (not isinstance(items, SpendingItemStore)):
+            items = SpendingItemStore.fromItems(items)
+
+        self.beginResetModel()
+        self.__store = items
+        self.__cellCache.clear()
+        self.endResetModel()
 
     def findItem(self, index: QModelIndex):
         return self.getItem(index.row())
 
-    def clear(self):
-        self.__dataList.clear()
+    def patchItem(self, id: int, items: SpendingItemStore):
+        row = self.__store.findId(id)
+        if (len(items) == 0):
+            if (row >= 0):
+                self.__removeRow(row)
+            return
+
+        target = self.__store.findSortedRow(items.getSortKey(0, self.__sortColumn), self.__sortColumn,
+                                            self.__sortDescending)
+        if (target == len(self.__store) and self.__hasMore):
+            # the row belongs to a page that isn't loaded yet and will arrive with it
+            if (row >= 0):
+                self.__removeRow(row)
+            return
+
+        if (row < 0):
+            self.beginInsertRows(QModelIndex(), target, target)
+            self.__store.insertRow(target, items)
+            self.__dropCellCache(target)
+            self.endInsertRows()
+        elif (target == row or target == row + 1):
+            self.__store.setRow(row, items)
+            self.__invalidateRow(row)
+        else:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target)
+            self.__store.removeRow(row)
+            if (target > row):
+                target -= 1
+            self.__store.insertRow(target, items)
+            self.__dropCellCache(min(row, target))
+            self.endMoveRows()
+            self.__invalidateRow(target)
+
+    def removeIds(self, ids):
+        rows = sorted(set(row for row in (self.__store.findId(id) for id in ids) if row >= 0))
+
+        ranges = []
+        for row in rows:
+            if (ranges and ranges[-1][0] + ranges[-1][1] == row):
+                ranges[-1][1] += 1
+            else:
+                ranges.append([row, 1])
+
+        if (len(ranges) <= self.MAX_REMOVE_RANGES):
+            # bottom up, so the rows still to go keep their numbers
+            for row, count in reversed(ranges):
+                self.__removeRows(row, count)
+            return
+
+        # many scattered rows: compact the store once and move the persistent indexes (selection, current row)
+        self.layoutAboutToBeChanged.emit()
+        oldIndexes = self.persistentIndexList()
+        newIndexes = []
+        for index in oldIndexes:
+            row = index.row()
+            removedBefore = bisect_right(rows, row)
+            if (removedBefore > 0 and rows[removedBefore - 1] == row):
+                newIndexes.append(QModelIndex())
+            else:
+                newIndexes.append(self.index(row - removedBefore, index.column()))
+        self.__store.removeRanges(ranges)
+        self.__dropCellCache(rows[0])
+        self.changePersistentIndexList(oldIndexes, newIndexes)
         self.layoutChanged.emit()
 
+    def __removeRow(self, row: int):
+        self.__removeRows(row, 1)
+
+    def __removeRows(self, row: int, count: int):
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        self.__store.removeRows(row, count)
+        self.__dropCellCache(row)
+        self.endRemoveRows()
+
+    def __dropCellCache(self, row: int):
+        for key in [key for key in self.__cellCache if key[0] >= row]:
+            del self.__cellCache[key]
+
+    def __invalidateRow(self, row: int):
+        for col in range(self.columnCount(None)):
+            self.__cellCache.pop((row, col), None)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount(None) - 1))
+
+    def setSource(self, source):
+        self.__source = source
+        self.__hasMore = source is not None
+        self.__fetching = False
+        self.__replacePending = True
+
+        if (self.__hasMore):
+            self.fetchMore(QModelIndex())
+        else:
+            self.pageFinished(False)
+
+    def canFetchMore(self, parent: QModelIndex):
+        return self.__hasMore and not self.__fetching
+
+    def fetchMore(self, parent: QModelIndex):
+        if (not self.__hasMore or self.__fetching):
+            return
+
+        if (len(self.__store) > 0 and not self.__replacePending):
+            last = self.__store.getItem(len(self.__store) - 1)
+        else:
+            last = None
+
+        self.__fetching = True
+        self.__source.fetchPage(self, last, self.PAGE_SIZE)
+
+    def receiveBatch(self, items):
+        if (self.__replacePending):
+            self.__replacePending = False
+            self.setItems(items)
+        else:
+            self.appendItems(items)
+
+    def pageFinished(self, hasMore: bool):
+        if (self.__replacePending):
+            self.__replacePending = False
+            self.setItems([])
+        self.__hasMore = hasMore
+        self.__fetching = False
+
+    def clear(self):
+        self.__source = None
+        self.__hasMore = False
+        self.__fetching = False
+        self.__replacePending = False
+        self.setItems([])
+
 
 class Database(QObject):
     databaseChanged = pyqtSignal()
+    itemInserted = pyqtSignal(int)
+    itemUpdated = pyqtSignal(int)
+    itemsDeleted = pyqtSignal(list)
     filtersChanged = pyqtSignal()
+    categoriesChanged = pyqtSignal()
+    profileChanged = pyqtSignal(str)
+    errorOccurred = pyqtSignal(str)
+
+    BULK_BATCH_SIZE = 5000
 
     def __init__(self, parent=None):
         super(Database, self).__init__(parent)
@@ -324,12 +935,16 @@ class Database(QObject):
         self.__driver = "QSQLITE"
         self.__db = QSqlDatabase.addDatabase(self.__driver)
 
-        self.__filterDateMin = None
-        self.__filterDateMax = None
-        self.__filterCostMin = None
-        self.__filterCostMax = None
-        self.__filterCat  = None
-        self.__filterComment = None
+        self.__filter = SpendingItemFilter()
+        self.__queryBuilder = SpendingItemQueryBuilder()
+        self.__queryCache = PreparedQueryCache(self.__db)
+
+        self.__appliedMigrations = []
+        self.__hasFullText = False
+        self.__profile = DEFAULT_PROFILE
+        self.__buckets = {}
+
+        self.databaseChanged.connect(self.__invalidateBuckets)
 
     def getConnection(self):
         return self.__db
@@ -340,50 +955,115 @@ class Database(QObject):
     def isOpen(self):
         return self.__db.isOpen()
 
+    def getFilter(self):
+        return self.__filter.copy()
+
+    def getQueryBuilder(self):
+        return self.__queryBuilder
+
     def setCostFilter(self, min, max):
-        self.__filterCostMin = min
-        self.__filterCostMax = max
+        self.__filter.setCostRange(min, max)
         self.filtersChanged.emit()
 
     def setDateFilter(self, min, max):
-        self.__filterDateMin = min
-        self.__filterDateMax = max
+        self.__filter.setDateRange(min, max)
         self.filtersChanged.emit()
 
     def setCategoryFilter(self, id):
-        self.__filterCat = id
+        self.__filter.setCategory(id)
+        self.filtersChanged.emit()
+
+    def setSort(self, column: str, descending: bool):
+        self.__filter.setSort(column, descending)
         self.filtersChanged.emit()
 
     def setCommentFilter(self, c):
-        self.__filterComment = c
+        self.__filter.setComment(c)
         self.filtersChanged.emit()
 
+    @instrumented
     def createEmptyDatabase(self, fileName):
         self.__db.setDatabaseName(fileName)
         self.__db.open()
 
-        query = QSqlQuery()
-        query.exec("CREATE TABLE category (id integer primary key, name varchar(40));")
-        query.exec("CREATE TABLE spendingItem (id integer primary key, date date, cost float, categoryId int, comment varchar(70));")
+        self.__applyProfile()
+        self.__migrate()
 
+    @instrumented
     def openDatabase(self, fileName):
         if (self.__db.isOpen()):
-            self.__db.close()
+            self.close()
 
         self.__db.setDatabaseName(fileName)
         self.__db.open()
 
         if (not self.__db.isOpen()):
-            e = QErrorMessage()
-            e.showMessage("Could not open database")
+            self.errorOccurred.emit("Could not open database")
+            return False
         else:
+            self.__applyProfile()
+            self.__migrate()
             self.databaseChanged.emit()
+            self.categoriesChanged.emit()
+            return True
+
+    def getProfile(self):
+        return self.__profile
+
+    def setProfile(self, name: str):
+        if (name not in PROFILES):
+            print("unknown database profile", name)
+            return False
+
+        self.__profile = name
+        success = self.__applyProfile()
+        self.profileChanged.emit(name)
+        return success
+
+    def isReadOnly(self):
+        return PROFILES[self.__profile].isReadOnly()
+
+    def __applyProfile(self):
+        if (not self.__db.isOpen()):
+            return True
+        self.__queryCache.clear()
+        return PROFILES[self.__profile].apply(self.__db)
+
+    def __migrate(self):
+        if (not self.__db.isOpen()):
+            return None
 
+        # the schema has to be current even on a read-only profile, so query_only is lifted while migrating
+        query = queryLog.newQuery(self.__db)
+        if (self.isReadOnly()):
+            query.exec("PRAGMA query_only = OFF;")
+
+        migrator = SchemaMigrator(self.__db)
+        self.__appliedMigrations = migrator.migrate()
+
+        if (self.isReadOnly()):
+            query.exec("PRAGMA query_only = ON;")
+        query.finish()
+        self.__hasFullText = hasTable(self.__db, "spendingItemFts")
+        self.__queryBuilder.setFullText(self.__hasFullText)
+        return self.__appliedMigrations
+
+    def hasFullTextIndex(self):
+        return self.__hasFullText
+
+    def getAppliedMigrations(self):
+        return self.__appliedMigrations
+
+    @instrumented
+    def getSchemaHistory(self):
+        return SchemaMigrator(self.__db).getHistory()
+
+    @instrumented
     def addSpendingItem(self, s: SpendingItem, triggerEvent=True):
         if (not self.__db.isOpen()):
             return False
 
-        query = QSqlQuery(self.__db)
+        query = queryLog.newQuery(self.__db)
         if (not s.hasId()):
             query.prepare("INSERT INTO spendingItem (date, cost, categoryId, comment) VALUES (:date, :cost, :catId, :comment);")
         else:
@@ -397,10 +1077,45 @@ class Database(QObject):
         if (not query.exec()):
             return False
 
+        if (not s.hasId()):
+            s.setId(query.lastInsertId())
+        self.__updateBuckets({toDate(s.getDate())} if s.getDate().isValid() else set())
         if (triggerEvent):
-            self.databaseChanged.emit()
+            self.itemInserted.emit(s.getId())
         return True
 
+    @instrumented
+    def addSpendingItems(self, items, batchSize=BULK_BATCH_SIZE, triggerEvent=True):
+        if (not self.__db.isOpen()):
+            return 0
+
+        query = queryLog.newQuery(self.__db)
+        query.prepare("INSERT INTO spendingItem (id, date, cost, categoryId, comment) VALUES (:id, :date, :cost, :catId, :comment);")
+
+        count = 0
+        pending = 0
+        self.__db.transaction()
+        for s in items:
+            query.bindValue(":id", s.getId())
+            query.bindValue(":date", s.getDate().toString(Qt.ISODate))
+            query.bindValue(":cost", s.getCost())
+            query.bindValue(":catId", s.getCategoryId())
+            query.bindValue(":comment", s.getComment())
+            if (query.exec()):
+                count += 1
+
+            pending += 1
+            if (pending >= batchSize):
+                self.__db.commit()
+                self.__db.transaction()
+                pending = 0
+        self.__db.commit()
+
+        if (triggerEvent and count > 0):
+            self.databaseChanged.emit()
+        return count
+
+    @instrumented
     def updateSpendingItem(self, s: SpendingItem):
         if (not self.__db.isOpen()):
             return False
@@ -408,7 +1123,11 @@ class Database(QObject):
         if (not s.hasId()):
             return False
 
-        query = QSqlQuery(self.__db)
+        days = self.__getDays([s.getId()])
+        if (s.getDate().isValid()):
+            days.add(toDate(s.getDate()))
+
+        query = queryLog.newQuery(self.__db)
         query.prepare("UPDATE spendingItem SET date = :date, cost = :cost, categoryId = :catId, comment = :comment WHERE id = :id;")
         query.bindValue(":id", s.getId())
         query.bindValue(":date", s.getDate())
@@ -419,40 +1138,50 @@ class Database(QObject):
         if (not query.exec()):
             return False
 
-        self.databaseChanged.emit()
+        self.__updateBuckets(days)
+        self.itemUpdated.emit(s.getId())
         return True
 
+    @instrumented
     def deleteListOfSpendingItems(self, listOfIDs):
+        days = self.__getDays(listOfIDs)
         queryString = "DELETE FROM spendingItem WHERE id IN ("
         for id in listOfIDs[:-1]:
                 queryString += str(id) + ","
 
         queryString += str(listOfIDs[len(listOfIDs)-1]) + ");"
-        query = QSqlQuery(self.__db)
+        query = queryLog.newQuery(self.__db)
         query.prepare(queryString)
         if (not query.exec()):
             print(query.lastError().text())
             return False
 
-        self.databaseChanged.emit()
+        self.__updateBuckets(days)
+        self.itemsDeleted.emit([int(id) for id in listOfIDs])
         return True
 
+    @instrumented
     def deleteSpendingItem(self, s: SpendingItem):
         if (not self.__db.isOpen()):
             return False
 
-        query = QSqlQuery(self.__db)
+        days = self.__getDays([s.getId()])
+
+        query = queryLog.newQuery(self.__db)
         query.prepare("DELETE FROM spendingItem WHERE id = :id;")
         query.bindValue(":id", s.getId())
         if (not query.exec()):
             return False
 
-        self.databaseChanged.emit()
+        self.__updateBuckets(days)
+
+        self.itemsDeleted.emit([s.getId()])
         return True
 
+    @instrumented
     def addCategory(self, c: Category):
         if (self.__db.isOpen()):
-            query = QSqlQuery(self.__db)
+            query = queryLog.newQuery(self.__db)
             if (not c.hasId()):
                 query.prepare("INSERT INTO category (name) VALUES (:name);")
             else:
@@ -463,79 +1192,153 @@ class Database(QObject):
             if (not query.exec()):
                 return False
             else:
-                self.databaseChanged.emit()
+                self.categoriesChanged.emit()
                 return True
         else:
             return False
 
-    def __getQueryString(self):
-        qBaseString = "SELECT s.id as id, s.date as date, s.cost as cost, c.name as catName, " \
-                      "s.comment as comment FROM spendingItem as s, Category as c WHERE c.id = s.categoryId"
+    @instrumented
+    def addCategories(self, categories, batchSize=BULK_BATCH_SIZE, triggerEvent=True):
+        if (not self.__db.isOpen()):
+            return 0
 
-        if (self.__filterCostMin != None):
-            qCostMinFilter = " AND cost >= "+str(self.__filterCostMin)
-        else:
-            qCostMinFilter = ""
+        query = queryLog.newQuery(self.__db)
+        query.prepare("INSERT INTO category (id, name) VALUES (:id, :name);")
 
-        if (self.__filterCostMax != None ):
-            qCostMaxFilter = " AND cost <= "+str(self.__filterCostMax)
-        else:
-            qCostMaxFilter = ""
+        count = 0
+        pending = 0
+        self.__db.transaction()
+        for c in categories:
+            query.bindValue(":id", c.getId())
+            query.bindValue(":name", c.getName())
+            if (query.exec()):
+                count += 1
 
-        if (self.__filterDateMin != None):
-            qDateMinFilter = " AND date >= '" + self.__filterDateMin.toString(Qt.ISODate) + "'"
-        else:
-            qDateMinFilter = ""
+            pending += 1
+            if (pending >= batchSize):
+                self.__db.commit()
+                self.__db.transaction()
+                pending = 0
+        self.__db.commit()
 
-        if (self.__filterDateMax != None):
-            qDateMaxFilter = " AND date <= '" + self.__filterDateMax.toString(Qt.ISODate) + "'"
-        else:
-            qDateMaxFilter = ""
+        if (triggerEvent and count > 0):
+            self.categoriesChanged.emit()
+        return count
 
-        if (self.__filterCat != None):
-            qCategoryFilter = " AND c.id = " + str(self.__filterCat)
-        else:
-            qCategoryFilter = ""
+    def getSpendingItems(self, itemList: ItemList):
+        if (not self.__db.isOpen()):
+            return None
 
-        if (self.__filterComment != None):
-            qCommentFilter = " AND s.comment LIKE '%" + self.__filterComment + "%'"
-        else:
-            qCommentFilter = ""
+        itemList.setSource(self)
 
-        return qBaseString + qCostMinFilter + qCostMaxFilter + \
-               qDateMinFilter + qDateMaxFilter + qCategoryFilter + qCommentFilter + " ORDER BY date DESC;"
+    @instrumented
+    def fetchPage(self, itemList: ItemList, after: SpendingItem, limit: int):
+        query = self.__execPageQuery(after, limit)
+        if (query is None):
+            itemList.pageFinished(False)
+            return
 
-    def getSpendingItems(self, itemList: ItemList):
+        batch = SpendingItemStore()
+        while (query.next()):
+            batch.appendQuery(query)
+        query.finish()
+
+        if (len(batch) > 0):
+            itemList.receiveBatch(batch)
+        itemList.pageFinished(len(batch) >= limit)
+
+    @instrumented
+    def getFilteredItem(self, id: int):
+        items = SpendingItemStore()
         if (not self.__db.isOpen()):
-            return None
+            return items
 
-        query = QSqlQuery(self.__db)
-        query.prepare(self.__getQueryString())
+        sql, params = self.__queryBuilder.buildItem(self.__filter, id)
+        query = self.__queryCache.get(sql, params)
+        if (query is None or not query.exec()):
+            return items
 
-        query.exec()
         while (query.next()):
-            sItem = SqlSpendingItem(query)
-            itemList.addItem(sItem)
+            items.appendQuery(query)
+        query.finish()
+        return items
+
+    def __execPageQuery(self, after: SpendingItem, limit: int):
+        if (not self.__db.isOpen()):
+            return None
+
+        afterKey = self.__queryBuilder.itemPageKey(self.__filter, after)
+
+        sql, params = self.__queryBuilder.buildPage(self.__filter, afterKey, limit)
+        query = self.__queryCache.get(sql, params)
+        if (query is None or not query.exec()):
+            return None
+        return query
 
+    @instrumented
     def getCategories(self, catList: CategoryList):
-        query = QSqlQuery(self.__db)
+        query = queryLog.newQuery(self.__db)
         query.exec("SELECt id, name FROM category;")
 
+        categories = []
         while(query.next()):
-            c = Category(query.value("id"), query.value("name"))
-            catList.addItem(c)
+            categories.append(Category(query.value("id"), query.value("name")))
+        catList.setItems(categories)
 
     def close(self):
+        self.__queryCache.clear()
+        self.__buckets.clear()
         self.__db.close()
 
+    @instrumented
+    def rebuildMonthlyTotals(self):
+        if (not self.__db.isOpen()):
+            return False
+
+        self.__db.transaction()
+        query = queryLog.newQuery(self.__db)
+        for statement in REBUILD_MONTHLY_TOTAL:
+            if (not query.exec(statement)):
+                print(query.lastError().text())
+                query.finish()
+                self.__db.rollback()
+                return False
+        query.finish()
+        self.__db.commit()
+
+        self.databaseChanged.emit()
+        return True
+
+    @staticmethod
+    def fingerprint(isoDate: str, cost: float, categoryId: int, comment: str):
+        return hash((isoDate, round(cost, 2), categoryId, comment or ""))
+
+    @instrumented
+    def getSpendingItemFingerprints(self):
+        fingerprints = Counter()
+        if (not self.__db.isOpen()):
+            return fingerprints
+
+        query = queryLog.newQuery(self.__db)
+        query.setForwardOnly(True)
+        if (not query.exec("SELECT date, cost, categoryId, comment FROM spendingItem;")):
+            print(query.lastError().text())
+            return fingerprints
+
+        while (query.next()):
+            fingerprints[self.fingerprint(query.value(0), query.value(1), query.value(2), query.value(3))] += 1
+        return fingerprints
+
+    @instrumented
     def getMonthlyTotal(self, limit=15):
-        sqlString = "SELECT SUM(cost) as total, strftime('%Y', date) as year, strftime('%m', date) as month " \
-                    "FROM spendingItem " \
+        sqlString = "SELECT SUM(total) as total, year, month " \
+                    "FROM monthlyTotal " \
+                    "WHERE year > 0 " \
                     "GROUP BY year, month " \
                     "ORDER BY year DESC, month DESC " \
                     "LIMIT :limit;" \
 
-        query = QSqlQuery(self.__db)
+        query = queryLog.newQuery(self.__db)
         query.prepare(sqlString)
         query.bindValue(":limit", limit)
         query.exec()
@@ -552,17 +1355,111 @@ class Database(QObject):
 
         return items
 
+    def __invalidateBuckets(self):
+        self.__buckets.clear()
+
+    def __getDays(self, ids):
+        days = set()
+        if ("day" not in self.__buckets or len(ids) == 0):
+            return days
+
+        query = queryLog.newQuery(self.__db)
+        query.exec("SELECT DISTINCT date FROM spendingItem WHERE id IN (" + ",".join(str(int(id)) for id in ids) + ");")
+        while (query.next()):
+            try:
+                days.add(date.fromisoformat(query.value(0)[:10]))
+            except (TypeError, ValueError):
+                pass
+        return days
+
+    @instrumented
+    def __updateBuckets(self, days):
+        # the coarse levels come from monthlyTotal, which the triggers already updated, so they are only dropped
+        for level in ("week", "month", "quarter", "year"):
+            self.__buckets.pop(level, None)
+
+        series = self.__buckets.get("day")
+        if (series is None or len(days) == 0):
+            return
+
+        query = queryLog.newQuery(self.__db)
+        query.prepare("SELECT SUM(cost) FROM spendingItem WHERE date >= :day AND date < :next;")
+        totals = {}
+        for d in days:
+            query.bindValue(":day", d.isoformat())
+            query.bindValue(":next", nextBucket(d, "day").isoformat())
+            if (not query.exec()):
+                print(query.lastError().text())
+                self.__buckets.pop("day", None)
+                return
+            totals[d] = 0.0
+            if (query.next() and not query.isNull(0)):
+                totals[d] = query.value(0)
+        query.finish()
+        series.setTotals(totals)
+
+    @instrumented
+    def __readBuckets(self, level: str):
+        query = queryLog.newQuery(self.__db)
+        query.setForwardOnly(True)
+
+        totals = {}
+        if (level == "day"):
+            if (not query.exec("SELECT date, SUM(cost) FROM spendingItem GROUP BY date;")):
+                print(query.lastError().text())
+                return None
+            while (query.next()):
+                try:
+                    d = date.fromisoformat(query.value(0)[:10])
+                except (TypeError, ValueError):
+                    continue
+                totals[d] = totals.get(d, 0.0) + query.value(1)
+        else:
+            if (not query.exec("SELECT year, month, SUM(total) FROM monthlyTotal WHERE year > 0 GROUP BY year, month;")):
+                print(query.lastError().text())
+                return None
+            while (query.next()):
+                totals[date(int(query.value(0)), int(query.value(1)), 1)] = query.value(2)
+        query.finish()
+
+        return BucketSeries("day" if level == "day" else "month", totals)
+
+    def __getBuckets(self, level: str):
+        if (level in self.__buckets):
+            return self.__buckets[level]
+
+        # only days and months are read from the database, the other levels are regrouped from them
+        if (level in ("day", "month")):
+            series = self.__readBuckets(level)
+        else:
+            base = self.__getBuckets("day" if level == "week" else "month")
+            series = base.regroup(level) if base is not None else None
+
+        if (series is not None):
+            self.__buckets[level] = series
+        return series
+
+    def getBucketTotals(self, level: str, dateMin=None, dateMax=None):
+        if (level not in BUCKET_LEVELS):
+            raise ValueError("unknown bucket level " + str(level))
+        if (not self.__db.isOpen()):
+            return []
+
+        series = self.__getBuckets(level)
+        if (series is None):
+            return []
+        return series.getEntries(dateMin, dateMax)
+
+    @instrumented
     def getMonthPerCategory(self, year, month):
-        sqlString = "SELECT SUM(cost) as total, " \
-                    "category.name, strftime('%Y', date) as year, strftime('%m', date) as month " \
-                    "FROM spendingItem, Category " \
-                    "WHERE year = :year AND month = :month AND categoryId = category.id " \
-                    "GROUP BY categoryId;"
+        sqlString = "SELECT m.total as total, c.name as name " \
+                    "FROM monthlyTotal as m, category as c " \
+                    "WHERE m.year = :year AND m.month = :month AND m.categoryId = c.id;"
 
-        query = QSqlQuery()
+        query = queryLog.newQuery(self.__db)
         query.prepare(sqlString)
-        query.bindValue(":year", str(year))
-        query.bindValue(":month", str(month))
+        query.bindValue(":year", int(year))
+        query.bindValue(":month", int(month))
 
         query.exec()
 
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+from PyQt5.QtSql import QSqlDatabase
+from diagnostics import queryLog
+
+
+class ConnectionProfile:
+
+    def __init__(self, name: str, description: str, pragmas):
+        self.__name = name
+        self.__description = description
+        self.__pragmas = pragmas
+
+    def getName(self):
+        return self.__name
+
+    def getDescription(self):
+        return self.__description
+
+    def getPragmas(self):
+        return list(self.__pragmas)
+
+    def isReadOnly(self):
+        return ("query_only", "ON") in self.__pragmas
+
+    def apply(self, connection: QSqlDatabase):
+        success = True
+        query = queryLog.newQuery(connection)
+        for name, value in self.__pragmas:
+            if (not query.exec("PRAGMA " + name + " = " + str(value) + ";")):
+                print("PRAGMA " + name + ":", query.lastError().text())
+                success = False
+        query.finish()
+        return success
+
+
+DEFAULT_PROFILE = "interactive"
+
+PROFILES = OrderedDict((p.getName(), p) for p in [
+    ConnectionProfile("compatible", "SQLite defaults: rollback journal, full sync, 2 MB cache, no mmap", [
+        ("query_only", "OFF"),
+        ("journal_mode", "DELETE"),
+        ("synchronous", "FULL"),
+        ("cache_size", -2000),
+        ("mmap_size", 0),
+        ("temp_store", "DEFAULT"),
+        ("wal_autocheckpoint", 1000)]),
+    ConnectionProfile("interactive", "WAL, normal sync, 16 MB cache, 256 MB mmap", [
+        ("query_only", "OFF"),
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -16000),
+        ("mmap_size", 268435456),
+        ("temp_store", "MEMORY"),
+        ("wal_autocheckpoint", 1000)]),
+    ConnectionProfile("bulk-import", "WAL, no sync, 128 MB cache, rare checkpoints", [
+        ("query_only", "OFF"),
+        ("journal_mode", "WAL"),
+        ("synchronous", "OFF"),
+        ("cache_size", -128000),
+        ("mmap_size", 268435456),
+        ("temp_store", "MEMORY"),
+        ("wal_autocheckpoint", 100000)]),
+    ConnectionProfile("read-only analytics", "WAL, read only, 256 MB cache, 1 GB mmap", [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -256000),
+        ("mmap_size", 1073741824),
+        ("temp_store", "MEMORY"),
+        ("wal_autocheckpoint", 1000),
+        ("query_only", "ON")])])
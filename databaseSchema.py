@@ -0,0 +1,190 @@
+from PyQt5.QtCore import QDateTime, Qt
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+from diagnostics import queryLog
+
+
+class Migration:
+
+    def __init__(self, version: int, description: str, statements):
+        self.__version = version
+        self.__description = description
+        self.__statements = statements
+
+    def getVersion(self):
+        return self.__version
+
+    def getDescription(self):
+        return self.__description
+
+    def apply(self, query: QSqlQuery):
+        for statement in self.__statements:
+            if (not query.exec(statement)):
+                return False
+        return True
+
+
+class OptionalMigration(Migration):
+
+    def __init__(self, version: int, description: str, statements):
+        super(OptionalMigration, self).__init__(version, description, statements)
+        self.__skipped = False
+
+    def getDescription(self):
+        description = super(OptionalMigration, self).getDescription()
+        if (self.__skipped):
+            return description + " (skipped, not supported by this SQLite build)"
+        return description
+
+    def apply(self, query: QSqlQuery):
+        self.__skipped = not super(OptionalMigration, self).apply(query)
+        return True
+
+
+def _monthKey(row: str):
+    return "IFNULL(CAST(strftime('%Y', " + row + ".date) AS int), 0), " \
+           "IFNULL(CAST(strftime('%m', " + row + ".date) AS int), 0), " \
+           "IFNULL(" + row + ".categoryId, -1)"
+
+
+def _monthMatch(row: str):
+    return "year = IFNULL(CAST(strftime('%Y', " + row + ".date) AS int), 0) " \
+           "AND month = IFNULL(CAST(strftime('%m', " + row + ".date) AS int), 0) " \
+           "AND categoryId = IFNULL(" + row + ".categoryId, -1)"
+
+
+def _monthlyTotalAdd(row: str):
+    return "INSERT OR IGNORE INTO monthlyTotal (year, month, categoryId, total, count) " \
+           "VALUES (" + _monthKey(row) + ", 0, 0); " \
+           "UPDATE monthlyTotal SET total = total + " + row + ".cost, count = count + 1 " \
+           "WHERE " + _monthMatch(row) + "; "
+
+
+def _monthlyTotalRemove(row: str):
+    return "UPDATE monthlyTotal SET total = total - " + row + ".cost, count = count - 1 " \
+           "WHERE " + _monthMatch(row) + "; " \
+           "DELETE FROM monthlyTotal WHERE count <= 0 AND " + _monthMatch(row) + "; "
+
+
+REBUILD_MONTHLY_TOTAL = [
+    "DELETE FROM monthlyTotal;",
+    "INSERT INTO monthlyTotal (year, month, categoryId, total, count) "
+    "SELECT IFNULL(CAST(strftime('%Y', date) AS int), 0) as y, IFNULL(CAST(strftime('%m', date) AS int), 0) as m, "
+    "IFNULL(categoryId, -1) as c, SUM(cost), COUNT(*) FROM spendingItem GROUP BY y, m, c;"]
+
+
+MIGRATIONS = [
+    Migration(1, "create category and spendingItem tables", [
+        "CREATE TABLE IF NOT EXISTS category (id integer primary key, name varchar(40));",
+        "CREATE TABLE IF NOT EXISTS spendingItem (id integer primary key, date date, cost float, categoryId int, comment varchar(70));"]),
+    Migration(2, "index spendingItem on (date, id) and (categoryId, date)", [
+        "CREATE INDEX IF NOT EXISTS spendingItemDateId ON spendingItem (date, id);",
+        "CREATE INDEX IF NOT EXISTS spendingItemCategoryDate ON spendingItem (categoryId, date);"]),
+    Migration(3, "add trigger-maintained monthlyTotal rollup table", [
+        "CREATE TABLE IF NOT EXISTS monthlyTotal (year int, month int, categoryId int, total float, count int, "
+        "PRIMARY KEY (year, month, categoryId));",
+        "CREATE TRIGGER IF NOT EXISTS monthlyTotalInsert AFTER INSERT ON spendingItem BEGIN " +
+        _monthlyTotalAdd("NEW") + "END;",
+        "CREATE TRIGGER IF NOT EXISTS monthlyTotalDelete AFTER DELETE ON spendingItem BEGIN " +
+        _monthlyTotalRemove("OLD") + "END;",
+        "CREATE TRIGGER IF NOT EXISTS monthlyTotalUpdate AFTER UPDATE OF date, cost, categoryId ON spendingItem BEGIN " +
+        _monthlyTotalRemove("OLD") + _monthlyTotalAdd("NEW") + "END;"] +
+        REBUILD_MONTHLY_TOTAL),
+    OptionalMigration(4, "add FTS5 full-text index over spendingItem comments", [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS spendingItemFts USING fts5(comment, content='spendingItem', content_rowid='id');",
+        "CREATE TRIGGER IF NOT EXISTS spendingItemFtsInsert AFTER INSERT ON spendingItem BEGIN "
+        "INSERT INTO spendingItemFts (rowid, comment) VALUES (NEW.id, NEW.comment); END;",
+        "CREATE TRIGGER IF NOT EXISTS spendingItemFtsDelete AFTER DELETE ON spendingItem BEGIN "
+        "INSERT INTO spendingItemFts (spendingItemFts, rowid, comment) VALUES ('delete', OLD.id, OLD.comment); END;",
+        "CREATE TRIGGER IF NOT EXISTS spendingItemFtsUpdate AFTER UPDATE OF comment ON spendingItem BEGIN "
+        "INSERT INTO spendingItemFts (spendingItemFts, rowid, comment) VALUES ('delete', OLD.id, OLD.comment); "
+        "INSERT INTO spendingItemFts (rowid, comment) VALUES (NEW.id, NEW.comment); END;",
+        "INSERT INTO spendingItemFts (spendingItemFts) VALUES ('rebuild');"]),
+    Migration(5, "index spendingItem and category for sorting by cost, comment and category name", [
+        "CREATE INDEX IF NOT EXISTS spendingItemCostId ON spendingItem (cost, id);",
+        "CREATE INDEX IF NOT EXISTS spendingItemCommentId ON spendingItem (comment, id);",
+        "CREATE INDEX IF NOT EXISTS spendingItemCategoryId ON spendingItem (categoryId, id);",
+        "CREATE INDEX IF NOT EXISTS categoryNameId ON category (name, id);"]),
+]
+
+
+def hasTable(connection: QSqlDatabase, name: str):
+    query = queryLog.newQuery(connection)
+    query.prepare("SELECT name FROM sqlite_master WHERE name = :name;")
+    query.bindValue(":name", name)
+    query.exec()
+    return query.next()
+
+
+def fullTextMatchExpression(text: str):
+    terms = []
+    for term in text.split():
+        terms.append('"' + term.replace('"', '""') + '"*')
+    return " ".join(terms)
+
+
+class SchemaMigrator:
+
+    def __init__(self, connection: QSqlDatabase, migrations=MIGRATIONS):
+        self.__db = connection
+        self.__migrations = sorted(migrations, key=lambda m: m.getVersion())
+
+    def getVersion(self):
+        query = queryLog.newQuery(self.__db)
+        query.exec("PRAGMA user_version;")
+        if (query.next()):
+            return int(query.value(0))
+        return 0
+
+    def getLatestVersion(self):
+        if (len(self.__migrations) > 0):
+            return self.__migrations[-1].getVersion()
+        return 0
+
+    def isUpToDate(self):
+        return self.getVersion() >= self.getLatestVersion()
+
+    def migrate(self):
+        applied = []
+        version = self.getVersion()
+
+        for m in self.__migrations:
+            if (m.getVersion() <= version):
+                continue
+
+            self.__db.transaction()
+            query = queryLog.newQuery(self.__db)
+            if (not self.__createLog(query) or not m.apply(query) or not self.__record(query, m)):
+                print("schema migration", m.getVersion(), "failed:", query.lastError().text())
+                query.finish()
+                self.__db.rollback()
+                return None
+            query.finish()
+            self.__db.commit()
+
+            applied.append(m)
+            version = m.getVersion()
+
+        return applied
+
+    def getHistory(self):
+        query = queryLog.newQuery(self.__db)
+        history = []
+        if (query.exec("SELECT version, description, appliedAt FROM schemaMigration ORDER BY version;")):
+            while (query.next()):
+                history.append([query.value("version"), query.value("description"), query.value("appliedAt")])
+        return history
+
+    def __createLog(self, query: QSqlQuery):
+        return query.exec("CREATE TABLE IF NOT EXISTS schemaMigration "
+                          "(version integer primary key, description text, appliedAt text);")
+
+    def __record(self, query: QSqlQuery, m: Migration):
+        query.prepare("INSERT INTO schemaMigration (version, description, appliedAt) VALUES (:version, :description, :appliedAt);")
+        query.bindValue(":version", m.getVersion())
+        query.bindValue(":description", m.getDescription())
+        query.bindValue(":appliedAt", QDateTime.currentDateTime().toString(Qt.ISODate))
+        if (not query.exec()):
+            return False
+
+        # PRAGMA does not accept bound parameters
+        return query.exec("PRAGMA user_version = " + str(int(m.getVersion())) + ";")
@@ -0,0 +1,171 @@
+import functools
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QDateTime, pyqtSignal
+from PyQt5.QtSql import QSqlQuery
+
+
+class QueryLogEntry:
+
+    def __init__(self, method: str, trigger: str, statement: str, bindCount: int):
+        self.__timestamp = QDateTime.currentDateTime()
+        self.__method = method
+        self.__trigger = trigger
+        self.__statement = statement
+        self.__bindCount = bindCount
+        self.__rows = 0
+        self.__prepareTime = 0.0
+        self.__execTime = 0.0
+
+    def getTimestamp(self):
+        return self.__timestamp
+
+    def getMethod(self):
+        return self.__method
+
+    def getTrigger(self):
+        return self.__trigger
+
+    def getStatement(self):
+        return self.__statement
+
+    def getBindCount(self):
+        return self.__bindCount
+
+    def getRows(self):
+        return self.__rows
+
+    def getPrepareTime(self):
+        return self.__prepareTime
+
+    def getExecTime(self):
+        return self.__execTime
+
+    def setRows(self, rows: int):
+        self.__rows = rows
+
+    def addRow(self):
+        self.__rows += 1
+
+    def setTimes(self, prepareTime: float, execTime: float):
+        self.__prepareTime = prepareTime
+        self.__execTime = execTime
+
+
+class InstrumentedQuery(QSqlQuery):
+
+    def __init__(self, log, connection):
+        super(InstrumentedQuery, self).__init__(connection)
+        self.__log = log
+        self.__prepareTime = 0.0
+        self.__entry = None
+
+    def prepare(self, sql):
+        start = time.perf_counter()
+        result = super(InstrumentedQuery, self).prepare(sql)
+        self.__prepareTime = time.perf_counter() - start
+        return result
+
+    def exec(self, *args):
+        start = time.perf_counter()
+        result = super(InstrumentedQuery, self).exec(*args)
+        execTime = time.perf_counter() - start
+
+        if (len(args) > 0):
+            prepareTime = 0.0
+            bindCount = 0
+        else:
+            prepareTime = self.__prepareTime
+            bindCount = len(self.boundValues())
+
+        self.__entry = self.__log.createEntry(self.lastQuery(), bindCount)
+        self.__entry.setTimes(prepareTime, execTime)
+        if (result and not self.isSelect()):
+            self.__entry.setRows(max(0, self.numRowsAffected()))
+        self.__log.record(self.__entry)
+        return result
+
+    def exec_(self, *args):
+        return self.exec(*args)
+
+    def next(self):
+        result = super(InstrumentedQuery, self).next()
+        if (result and self.__entry is not None):
+            self.__entry.addRow()
+        return result
+
+
+class QueryLog(QObject):
+    entryAdded = pyqtSignal(object)
+    enabledChanged = pyqtSignal(bool)
+
+    def __init__(self, maxEntries=1000, parent=None):
+        super(QueryLog, self).__init__(parent)
+
+        self.__enabled = False
+        self.__entries = deque(maxlen=maxEntries)
+        self.__context = threading.local()
+
+    def isEnabled(self):
+        return self.__enabled
+
+    def setEnabled(self, enabled: bool):
+        if (enabled != self.__enabled):
+            self.__enabled = enabled
+            self.enabledChanged.emit(enabled)
+
+    def newQuery(self, connection):
+        if (self.__enabled):
+            return InstrumentedQuery(self, connection)
+        return QSqlQuery(connection)
+
+    def isCurrent(self, query: QSqlQuery):
+        return isinstance(query, InstrumentedQuery) == self.__enabled
+
+    def getMethod(self):
+        return getattr(self.__context, "method", "")
+
+    def setMethod(self, method: str):
+        previous = self.getMethod()
+        self.__context.method = method
+        return previous
+
+    def getTrigger(self):
+        return getattr(self.__context, "trigger", "")
+
+    def setTrigger(self, trigger: str):
+        previous = self.getTrigger()
+        self.__context.trigger = trigger
+        return previous
+
+    def createEntry(self, statement: str, bindCount: int):
+        return QueryLogEntry(self.getMethod(), self.getTrigger(), statement, bindCount)
+
+    def record(self, entry: QueryLogEntry):
+        self.__entries.append(entry)
+        self.entryAdded.emit(entry)
+
+    def getEntries(self):
+        return list(self.__entries)
+
+    def clear(self):
+        self.__entries.clear()
+
+
+queryLog = QueryLog()
+
+
+def instrumented(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if (not queryLog.isEnabled()):
+            return method(self, *args, **kwargs)
+
+        previous = queryLog.setMethod(type(self).__name__ + "." + method.__name__)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            queryLog.setMethod(previous)
+    return wrapper
@@ -0,0 +1,139 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QLabel, QTableView, \
+    QHeaderView
+from diagnostics import queryLog, QueryLogEntry
+
+
+class QueryLogModel(QAbstractTableModel):
+
+    def __init__(self, log, parent=None):
+        super(QueryLogModel, self).__init__(parent)
+
+        self.__log = log
+        self.__entries = []
+        self.__headers = ['Time', 'Trigger', 'Method', 'Statement', 'Binds', 'Rows', 'Prepare ms', 'Exec ms']
+
+    def reload(self):
+        self.beginResetModel()
+        self.__entries = self.__log.getEntries()
+        self.endResetModel()
+
+    def refreshRows(self):
+        if (len(self.__entries) > 0):
+            self.dataChanged.emit(self.index(0, 5), self.index(len(self.__entries) - 1, 5))
+
+    def getEntry(self, row: int):
+        return self.__entries[row]
+
+    def rowCount(self, parent: QModelIndex):
+        return len(self.__entries)
+
+    def columnCount(self, parent: QModelIndex):
+        return len(self.__headers)
+
+    def data(self, index: QModelIndex, role):
+        col = index.column()
+        row = index.row()
+        if (row < 0 or row >= len(self.__entries)):
+            return None
+
+        entry: QueryLogEntry = self.__entries[row]
+        if (role == Qt.DisplayRole):
+            if (col == 0):
+                return entry.getTimestamp().toString("hh:mm:ss.zzz")
+            elif (col == 1):
+                return entry.getTrigger()
+            elif (col == 2):
+                return entry.getMethod()
+            elif (col == 3):
+                return " ".join(entry.getStatement().split())
+            elif (col == 4):
+                return entry.getBindCount()
+            elif (col == 5):
+                return entry.getRows()
+            elif (col == 6):
+                return "%.3f" % (entry.getPrepareTime() * 1000.0)
+            elif (col == 7):
+                return "%.3f" % (entry.getExecTime() * 1000.0)
+        elif (role == Qt.ToolTipRole and col == 3):
+            return entry.getStatement()
+        elif (role == Qt.TextAlignmentRole and col >= 4):
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role):
+        if (role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.__headers)):
+            return self.__headers[section]
+        return None
+
+
+class DiagnosticsWidget(QWidget):
+
+    def __init__(self, parent=None):
+        super(DiagnosticsWidget, self).__init__(parent)
+
+        self.__dirty = True
+        self.__model = QueryLogModel(queryLog, self)
+
+        self.__chkEnabled = QCheckBox("Record queries")
+        self.__chkEnabled.setChecked(queryLog.isEnabled())
+        self.__chkEnabled.toggled.connect(queryLog.setEnabled)
+        self.__btnClear = QPushButton("Clear")
+        self.__btnClear.clicked.connect(self.clear)
+        self.__lblSummary = QLabel()
+
+        self.__view = QTableView()
+        self.__view.setModel(self.__model)
+        self.__view.setSelectionBehavior(QTableView.SelectRows)
+        self.__view.verticalHeader().setVisible(False)
+        self.__view.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+
+        _top = QHBoxLayout()
+        _top.addWidget(self.__chkEnabled)
+        _top.addWidget(self.__btnClear)
+        _top.addStretch()
+        _top.addWidget(self.__lblSummary)
+
+        _layout = QVBoxLayout()
+        _layout.addLayout(_top)
+        _layout.addWidget(self.__view)
+        self.setLayout(_layout)
+
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(250)
+        self.__timer.timeout.connect(self.refreshLog)
+
+        queryLog.entryAdded.connect(self.entryAdded)
+        queryLog.enabledChanged.connect(self.__chkEnabled.setChecked)
+
+    def entryAdded(self, entry):
+        self.__dirty = True
+
+    def clear(self):
+        queryLog.clear()
+        self.__dirty = True
+        self.refreshLog()
+
+    def refreshLog(self):
+        if (not self.__dirty):
+            self.__model.refreshRows()
+            return
+
+        self.__dirty = False
+        atBottom = self.__view.verticalScrollBar().value() == self.__view.verticalScrollBar().maximum()
+        self.__model.reload()
+        if (atBottom):
+            self.__view.scrollToBottom()
+
+        entries = queryLog.getEntries()
+        total = sum(e.getPrepareTime() + e.getExecTime() for e in entries)
+        self.__lblSummary.setText(str(len(entries)) + " queries, " + ("%.1f" % (total * 1000.0)) + " ms")
+
+    def showEvent(self, event):
+        super(DiagnosticsWidget, self).showEvent(event)
+        self.refreshLog()
+        self.__timer.start()
+
+    def hideEvent(self, event):
+        super(DiagnosticsWidget, self).hideEvent(event)
+        self.__timer.stop()
@@ -0,0 +1,126 @@
+from PyQt5.QtCore import QThread
+from PyQt5.QtWidgets import QDialog, \
+    QVBoxLayout, \
+    QHBoxLayout, \
+    QLabel, \
+    QLineEdit, \
+    QPushButton, \
+    QComboBox, \
+    QProgressBar, \
+    QFileDialog
+from exporter import Exporter
+
+
+class ExportWidget(QDialog):
+    def __init__(self, database, parent=None):
+        super(ExportWidget, self).__init__(parent)
+        self.setGeometry(100, 100, 500, 200)
+        self.setWindowTitle("Export Data")
+        self.setModal(True)
+
+        self.__database = database
+        self.__formats = [("csv", "CSV"), ("jsonl", "JSON Lines"), ("xlsx", "Excel Workbook (xlsx)")]
+
+        _lv = QVBoxLayout()
+        self.setLayout(_lv)
+
+        _lh = QHBoxLayout()
+
+        self.__lblFileName = QLabel("File name:")
+        self.__txtFileName = QLineEdit()
+        self.__btnSave = QPushButton("save as")
+
+        _lh.addWidget(self.__lblFileName)
+        _lh.addWidget(self.__txtFileName)
+        _lh.addWidget(self.__btnSave)
+
+        _lv.addLayout(_lh)
+
+        self.__cmbFormat = QComboBox()
+        for format, name in self.__formats:
+            self.__cmbFormat.addItem(name, format)
+        _lv.addWidget(self.__cmbFormat)
+
+        _lh2 = QHBoxLayout()
+        self.__lblStatus = QLabel()
+        _lh2.addWidget(self.__lblStatus)
+        _lh2.addStretch(10)
+        self.__btnCancel = QPushButton("cancel")
+        self.__btnCancel.setEnabled(False)
+        self.__btnExport = QPushButton("export")
+        self.__btnExport.setEnabled(False)
+        self.__btnExport.setFixedWidth(80)
+        _lh2.addWidget(self.__btnCancel)
+        _lh2.addWidget(self.__btnExport)
+        _lv.addLayout(_lh2)
+
+        self.__progressBar = QProgressBar()
+        _lv.addWidget(self.__progressBar)
+
+        _lh3 = QHBoxLayout()
+        _lh3.addStretch(10)
+        self.__btnClose = QPushButton("close")
+
+        _lh3.addWidget(self.__btnClose)
+        _lv.addLayout(_lh3)
+
+        self.__progressBar.setMinimum(0)
+        self.__progressBar.setMaximum(100)
+        self.__progressBar.setValue(0)
+
+        self.__btnExport.clicked.connect(self.export_clicked)
+        self.__btnClose.clicked.connect(self.close_clicked)
+        self.__btnSave.clicked.connect(self.save_clicked)
+        self.__txtFileName.textChanged.connect(self.txtFilename_changed)
+        self.__btnCancel.clicked.connect(self.cancel_clicked)
+
+        self.__controlGroup1 = [self.__txtFileName, self.__btnExport, self.__btnSave, self.__btnClose, self.__cmbFormat]
+
+    def txtFilename_changed(self):
+        fileName = self.__txtFileName.text()
+        self.__btnExport.setEnabled(fileName != "")
+        if (fileName != ""):
+            self.__cmbFormat.setCurrentIndex(self.__cmbFormat.findData(Exporter.formatForFileName(fileName)))
+
+    def save_clicked(self):
+        d = QFileDialog(self)
+        fileName, type = d.getSaveFileName(self, "Export", "", "CSV (*.csv);;JSON Lines (*.jsonl);;Excel (*.xlsx)")
+
+        if (fileName != ""):
+            self.__txtFileName.setText(fileName)
+
+    def close_clicked(self):
+        self.close()
+
+    def counted(self, count):
+        self.__progressBar.setMaximum(max(1, count))
+
+    def tick(self, step):
+        self.__progressBar.setValue(step)
+        self.__lblStatus.setText(str(step) + " items")
+
+    def export_clicked(self):
+        for c in self.__controlGroup1:
+            c.setEnabled(False)
+        self.__btnCancel.setEnabled(True)
+        self.__progressBar.setValue(0)
+
+        self.thread = QThread()
+        self.exportWorker = Exporter(self.__txtFileName.text(), self.__database, self.__cmbFormat.currentData())
+        self.exportWorker.moveToThread(self.thread)
+        self.thread.started.connect(self.exportWorker.run)
+        self.exportWorker.finished.connect(self.thread.quit)
+        self.exportWorker.counted.connect(self.counted)
+        self.exportWorker.tick.connect(self.tick)
+        self.exportWorker.finished.connect(self.export_done)
+        self.thread.start()
+
+    def export_done(self, success):
+        for c in self.__controlGroup1:
+            c.setEnabled(True)
+        self.__btnCancel.setEnabled(False)
+        if (not success):
+            self.__lblStatus.setText("export failed or cancelled")
+
+    def cancel_clicked(self):
+        self.exportWorker.cancel()
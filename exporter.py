@@ -0,0 +1,229 @@
+import csv
+import itertools
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtSql import QSqlDatabase
+from databaseSchema import hasTable
+from diagnostics import instrumented
+from queryBuilder import SpendingItemQueryBuilder, PreparedQueryCache
+
+
+STDOUT = "-"
+
+
+def openTextFile(fileName: str, newline=None):
+    if (fileName == STDOUT):
+        return sys.stdout
+    return open(fileName, "w", newline=newline, encoding="utf-8")
+
+
+def closeTextFile(file):
+    if (file is not sys.stdout):
+        file.close()
+
+
+class CsvWriter:
+
+    def __init__(self, fileName: str):
+        self.__file = openTextFile(fileName, "")
+        self.__writer = csv.writer(self.__file)
+
+    def writeHeader(self, names):
+        self.__writer.writerow(names)
+
+    def writeRow(self, values):
+        self.__writer.writerow(values)
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        closeTextFile(self.__file)
+
+
+class JsonLinesWriter:
+
+    def __init__(self, fileName: str):
+        self.__file = openTextFile(fileName)
+        self.__names = []
+
+    def writeHeader(self, names):
+        self.__names = names
+
+    def writeRow(self, values):
+        self.__file.write(json.dumps(dict(zip(self.__names, values)), ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        closeTextFile(self.__file)
+
+
+class XlsxWriter:
+
+    def __init__(self, fileName: str):
+        if (fileName == STDOUT):
+            raise OSError("xlsx can not be written to stdout")
+        import openpyxl
+        self.__fileName = fileName
+        self.__book = openpyxl.Workbook(write_only=True)
+        self.__sheet = self.__book.create_sheet("items")
+
+    def writeHeader(self, names):
+        self.__sheet.append(names)
+
+    def writeRow(self, values):
+        self.__sheet.append(values)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.__book.save(self.__fileName)
+
+
+class Exporter(QObject):
+    finished = pyqtSignal(bool)
+    counted = pyqtSignal(int)
+    tick = pyqtSignal(int)
+
+    CHUNK_SIZE = 2000
+    COLUMNS = ["id", "date", "cost", "category", "comment"]
+    WRITERS = {
+        "csv": CsvWriter,
+        "jsonl": JsonLinesWriter,
+        "xlsx": XlsxWriter}
+
+    __connectionIds = itertools.count()
+
+    def __init__(self, fileName, db, format=None, parent=None):
+        super(Exporter, self).__init__(parent)
+        self.stop = False
+        self.exported = 0
+
+        self.__fileName = fileName
+        self.__format = format or self.formatForFileName(fileName)
+        self.__databaseName = db.getFileName()
+        self.__filter = db.getFilter()
+        self.__connectionName = "exporter" + str(next(self.__connectionIds))
+        self.__chunkSize = self.CHUNK_SIZE
+        self.__limit = None
+
+    @staticmethod
+    def formatForFileName(fileName: str):
+        ext = os.path.splitext(fileName)[1].lower().lstrip(".")
+        if (ext in ("json", "jsonl", "ndjson")):
+            return "jsonl"
+        elif (ext in ("xlsx", "xlsm")):
+            return "xlsx"
+        return "csv"
+
+    def getFormat(self):
+        return self.__format
+
+    def setChunkSize(self, chunkSize: int):
+        self.__chunkSize = max(1, chunkSize)
+
+    def setLimit(self, limit):
+        self.__limit = limit
+
+    def cancel(self):
+        self.stop = True
+
+    def run(self):
+        success = self.export()
+        self.finished.emit(success)
+
+    def export(self):
+        writerClass = self.WRITERS.get(self.__format)
+        if (writerClass is None):
+            print("unknown export format", self.__format)
+            return False
+
+        db = QSqlDatabase.addDatabase("QSQLITE", self.__connectionName)
+        db.setConnectOptions("QSQLITE_BUSY_TIMEOUT=5000;QSQLITE_OPEN_READONLY")
+        db.setDatabaseName(self.__databaseName)
+        try:
+            if (not db.open()):
+                print(db.lastError().text())
+                return False
+
+            try:
+                writer = writerClass(self.__fileName)
+            except (OSError, ImportError) as e:
+                print(e)
+                return False
+
+            try:
+                success = self.__write(db, writer)
+            finally:
+                writer.close()
+
+            if (not success and self.__fileName != STDOUT):
+                os.remove(self.__fileName)
+            return success
+        finally:
+            db.close()
+            db = None
+            QSqlDatabase.removeDatabase(self.__connectionName)
+
+    @instrumented
+    def __write(self, db, writer):
+        builder = SpendingItemQueryBuilder(hasTable(db, "spendingItemFts"))
+        cache = PreparedQueryCache(db, 2)
+
+        sql, params = builder.buildCount(self.__filter)
+        query = cache.get(sql, params)
+        if (query is None or not query.exec() or not query.next()):
+            cache.clear()
+            return False
+        count = query.value(0)
+        if (self.__limit is not None):
+            count = min(count, self.__limit)
+        self.counted.emit(count)
+
+        writer.writeHeader(self.COLUMNS)
+
+        # every chunk is its own short read, so the database is never locked for the whole export
+        after = None
+        while (not self.stop):
+            chunkSize = self.__chunkSize
+            if (self.__limit is not None):
+                chunkSize = min(chunkSize, self.__limit - self.exported)
+                if (chunkSize <= 0):
+                    break
+
+            sql, params = builder.buildPage(self.__filter, after, chunkSize)
+            query = cache.get(sql, params)
+            if (query is None or not query.exec()):
+                cache.clear()
+                return False
+
+            rows = 0
+            last = None
+            while (query.next()):
+                last = [query.value(0), query.value(1), query.value(2), query.value(3), query.value(4), query.value(5)]
+                if (last[1] == "" and query.isNull(1)):
+                    last[1] = None
+                if (last[4] == "" and query.isNull(4)):
+                    last[4] = None
+                writer.writeRow(last[:5])
+                rows += 1
+            query.finish()
+
+            if (last is not None):
+                after = builder.pageKey(self.__filter, last[0], last[1], last[2], last[3], last[5], last[4])
+
+            writer.flush()
+            self.exported += rows
+            self.tick.emit(self.exported)
+
+            if (rows < chunkSize):
+                break
+
+        cache.clear()
+        return not self.stop
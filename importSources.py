@@ -0,0 +1,354 @@
+import csv
+import os
+
+from PyQt5.QtCore import QDate, Qt
+
+
+class ImportSource:
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def getNumberOfItems(self):
+        return 0
+
+    def readCategories(self):
+        return iter(())
+
+    def readItems(self):
+        return iter(())
+
+
+class WorkbookSource(ImportSource):
+    ITEM_SHEET = 0
+    CATEGORY_SHEET = 1
+
+    def __init__(self, fileName: str):
+        self.__fileName = fileName
+        self.__itemColumnIndex = {
+            'date': 0,
+            'cost': 1,
+            'cat_id': 2,
+            'cat_text': 3,
+            'comment': 4}
+        self.__catColumnIndex = {
+            'cat_id': 0,
+            'cat_text': 1}
+
+    def getFileName(self):
+        return self.__fileName
+
+    def getItemColumnCount(self):
+        return max(self.__itemColumnIndex.values()) + 1
+
+    def getCategoryColumnCount(self):
+        return max(self.__catColumnIndex.values()) + 1
+
+    def itemRows(self):
+        return iter(())
+
+    def categoryRows(self):
+        return iter(())
+
+    def dateFromValue(self, value):
+        return None
+
+    def __value(self, row, index):
+        if (index >= len(row) or row[index] is None):
+            return ""
+        return row[index]
+
+    def readCategories(self):
+        for row in self.categoryRows():
+            id = self.__value(row, self.__catColumnIndex['cat_id'])
+            text = self.__value(row, self.__catColumnIndex['cat_text'])
+
+            if (text != "" and id != ""):
+                yield (int(id), str(text))
+            else:
+                yield None
+
+    def readItems(self):
+        for row in self.itemRows():
+            dVal = self.__value(row, self.__itemColumnIndex['date'])
+            cost = self.__value(row, self.__itemColumnIndex['cost'])
+            catId = self.__value(row, self.__itemColumnIndex['cat_id'])
+            catName = self.__value(row, self.__itemColumnIndex['cat_text'])
+            comment = self.__value(row, self.__itemColumnIndex['comment'])
+
+            if (cost != "" and dVal != ""):
+                d = self.dateFromValue(dVal)
+                catId = int(catId) if catId != "" else None
+                if (catId is not None):
+                    catName = None
+                yield (d, float(cost), catId, str(catName) if catName != "" else None, str(comment))
+            else:
+                yield None
+
+
+class ExcelSource(WorkbookSource):
+
+    def __init__(self, fileName: str):
+        super(ExcelSource, self).__init__(fileName)
+        self.__isOpen = False
+
+        self.__book = None
+        self.__sheetItems = None
+        self.__sheetCategories = None
+
+    def open(self):
+        if (not self.__isOpen):
+            import xlrd
+            self.__book = xlrd.open_workbook(self.getFileName(), encoding_override="utf-8", on_demand=True)
+            self.__sheetItems = self.__book.sheet_by_index(self.ITEM_SHEET)
+            self.__sheetCategories = self.__book.sheet_by_index(self.CATEGORY_SHEET)
+            self.__isOpen = True
+        return True
+
+    def close(self):
+        if (self.__isOpen):
+            self.__book.release_resources()
+            self.__sheetItems = None
+            self.__sheetCategories = None
+            self.__isOpen = False
+
+    def getNumberOfItems(self):
+        if (self.__isOpen):
+            return self.__sheetItems.nrows + self.__sheetCategories.nrows
+        else:
+            return 0
+
+    def dateFromValue(self, value):
+        import xlrd
+        year, month, day, hour, minute, second = xlrd.xldate_as_tuple(value, self.__book.datemode)
+        return QDate(year, month, day)
+
+    def categoryRows(self):
+        sheet = self.__sheetCategories
+        columns = min(sheet.ncols, self.getCategoryColumnCount())
+        for i in range(0, sheet.nrows):
+            yield sheet.row_values(i, 0, columns)
+
+    def itemRows(self):
+        sheet = self.__sheetItems
+        columns = min(sheet.ncols, self.getItemColumnCount())
+        for i in range(1, sheet.nrows):
+            yield sheet.row_values(i, 0, columns)
+
+
+class XlsxSource(WorkbookSource):
+
+    def __init__(self, fileName: str):
+        super(XlsxSource, self).__init__(fileName)
+        self.__book = None
+
+    def open(self):
+        if (self.__book is None):
+            import openpyxl
+            self.__book = openpyxl.load_workbook(self.getFileName(), read_only=True, data_only=True)
+        return True
+
+    def close(self):
+        if (self.__book is not None):
+            self.__book.close()
+            self.__book = None
+
+    def __sheet(self, index):
+        if (self.__book is None or index >= len(self.__book.worksheets)):
+            return None
+        return self.__book.worksheets[index]
+
+    def getNumberOfItems(self):
+        count = 0
+        for index in (self.ITEM_SHEET, self.CATEGORY_SHEET):
+            sheet = self.__sheet(index)
+            if (sheet is not None and sheet.max_row is not None):
+                count += sheet.max_row
+        return count
+
+    def dateFromValue(self, value):
+        if (not hasattr(value, "year")):
+            from openpyxl.utils.datetime import from_excel
+            value = from_excel(value)
+        return QDate(value.year, value.month, value.day)
+
+    def categoryRows(self):
+        sheet = self.__sheet(self.CATEGORY_SHEET)
+        if (sheet is None):
+            return iter(())
+        return sheet.iter_rows(min_row=1, max_col=self.getCategoryColumnCount(), values_only=True)
+
+    def itemRows(self):
+        sheet = self.__sheet(self.ITEM_SHEET)
+        if (sheet is None):
+            return iter(())
+        return sheet.iter_rows(min_row=2, max_col=self.getItemColumnCount(), values_only=True)
+
+
+class CsvSource(ImportSource):
+    COLUMN_NAMES = {
+        'date': ("date", "datum", "booking date", "buchungstag", "valuta"),
+        'cost': ("cost", "amount", "betrag", "value"),
+        'cat_id': ("cat_id", "category id", "categoryid"),
+        'cat_text': ("cat_text", "category", "kategorie"),
+        'comment': ("comment", "description", "memo", "text", "verwendungszweck", "buchungstext")}
+    DATE_FORMATS = [Qt.ISODate, "dd.MM.yyyy", "dd.MM.yy", "dd/MM/yyyy", "yyyy/MM/dd"]
+
+    def __init__(self, fileName: str, delimiter=None, decimal=None, dateFormat=None, columns=None,
+                 hasHeader=True, encoding="utf-8-sig"):
+        self.__fileName = fileName
+        self.__delimiter = delimiter
+        self.__decimal = decimal
+        self.__dateFormats = [dateFormat] if dateFormat else list(self.DATE_FORMATS)
+        self.__columns = columns
+        self.__hasHeader = hasHeader
+        self.__encoding = encoding
+        self.__columnIndex = {}
+        self.__numberOfItems = None
+
+        self.__file = None
+        self.__reader = None
+
+    def open(self):
+        if (self.__file is not None):
+            return True
+
+        self.__file = open(self.__fileName, "r", newline="", encoding=self.__encoding)
+        if (self.__delimiter is None):
+            self.__delimiter = self.__sniffDelimiter(self.__file.read(65536))
+            self.__file.seek(0)
+
+        self.__reader = csv.reader(self.__file, delimiter=self.__delimiter)
+        header = next(self.__reader, []) if self.__hasHeader else []
+        self.__columnIndex = self.__resolveColumns(header)
+        return True
+
+    def close(self):
+        if (self.__file is not None):
+            self.__file.close()
+            self.__file = None
+            self.__reader = None
+
+    def getDelimiter(self):
+        return self.__delimiter
+
+    def getColumnIndex(self):
+        return dict(self.__columnIndex)
+
+    def __sniffDelimiter(self, sample: str):
+        ext = os.path.splitext(self.__fileName)[1].lower()
+        if (ext in (".tsv", ".tab")):
+            return "\t"
+
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            return ","
+
+    def __resolveColumns(self, header):
+        names = [h.strip().lower() for h in header]
+        index = {}
+
+        if (self.__columns is None):
+            for field, aliases in self.COLUMN_NAMES.items():
+                for alias in aliases:
+                    if (alias in names):
+                        index[field] = names.index(alias)
+                        break
+            if ('date' not in index or 'cost' not in index):
+                index = {'date': 0, 'cost': 1, 'cat_id': 2, 'cat_text': 3, 'comment': 4}
+        else:
+            for field, column in self.__columns.items():
+                if (isinstance(column, int)):
+                    index[field] = column
+                elif (column.strip().lower() in names):
+                    index[field] = names.index(column.strip().lower())
+                else:
+                    raise ValueError("column '" + column + "' not found in " + self.__fileName)
+
+        return index
+
+    def getNumberOfItems(self):
+        if (self.__numberOfItems is None):
+            lines = 0
+            last = b"\n"
+            with open(self.__fileName, "rb") as f:
+                chunk = f.read(1 << 20)
+                while (chunk):
+                    lines += chunk.count(b"\n")
+                    last = chunk[-1:]
+                    chunk = f.read(1 << 20)
+            if (last != b"\n"):
+                lines += 1
+            self.__numberOfItems = max(0, lines - (1 if self.__hasHeader else 0))
+        return self.__numberOfItems
+
+    def parseCost(self, text: str):
+        text = text.strip().replace(" ", "").replace(" ", "")
+        decimal = self.__decimal
+        if (decimal is None):
+            comma = text.rfind(",")
+            dot = text.rfind(".")
+            if (comma >= 0 and dot >= 0):
+                decimal = "," if comma > dot else "."
+            elif (comma >= 0 and text.count(",") == 1):
+                decimal = ","
+            else:
+                decimal = "."
+
+        thousands = "." if decimal == "," else ","
+        return float(text.replace(thousands, "").replace(decimal, "."))
+
+    def parseDate(self, text: str):
+        text = text.strip()
+        for i, format in enumerate(self.__dateFormats):
+            d = QDate.fromString(text, format)
+            if (d.isValid()):
+                if (i > 0):
+                    self.__dateFormats.insert(0, self.__dateFormats.pop(i))
+                return d
+        return None
+
+    def __field(self, row, name):
+        i = self.__columnIndex.get(name)
+        if (i is None or i >= len(row)):
+            return ""
+        return row[i].strip()
+
+    def readItems(self):
+        for row in self.__reader:
+            dVal = self.__field(row, 'date')
+            cost = self.__field(row, 'cost')
+            if (cost == "" or dVal == ""):
+                yield None
+                continue
+
+            d = self.parseDate(dVal)
+            try:
+                cost = self.parseCost(cost)
+            except ValueError:
+                cost = None
+            if (d is None or cost is None):
+                yield None
+                continue
+
+            catId = self.__field(row, 'cat_id')
+            try:
+                catId = int(catId) if catId != "" else None
+            except ValueError:
+                catId = None
+            catName = self.__field(row, 'cat_text') or None
+
+            yield (d, cost, catId, catName, self.__field(row, 'comment'))
+
+
+def createSource(fileName: str, **options):
+    ext = os.path.splitext(fileName)[1].lower()
+    if (ext in (".csv", ".tsv", ".tab", ".txt")):
+        return CsvSource(fileName, **options)
+    elif (ext in (".xlsx", ".xlsm")):
+        return XlsxSource(fileName)
+    return ExcelSource(fileName)
@@ -0,0 +1,194 @@
+import os.path
+
+from PyQt5.QtCore import Qt, QThread
+from PyQt5.QtGui import QPalette
+from PyQt5.QtWidgets import QDialog, \
+    QVBoxLayout, \
+    QHBoxLayout, \
+    QLabel, \
+    QLineEdit, \
+    QPushButton, \
+    QCheckBox, \
+    QComboBox, \
+    QProgressBar, \
+    QFileDialog
+from dataObjects import Importer
+
+IMPORT_PROFILE = "bulk-import"
+
+
+class ImportWidget(QDialog):
+    def __init__(self, database, categories=None, parent=None):
+        super(ImportWidget, self).__init__(parent)
+        self.setGeometry(100, 100, 500, 200)
+        self.setWindowTitle("Import Data")
+        self.setModal(True)
+
+        self.__database = database
+        self.__categories = categories
+        self.__previousProfile = None
+
+        _lv = QVBoxLayout()
+        self.setLayout(_lv)
+
+        _lh = QHBoxLayout()
+
+        self.__lblFileName = QLabel("File name:")
+        self.__txtFileName = QLineEdit()
+        self.__btnLoad = QPushButton("load")
+
+        _lh.addWidget(self.__lblFileName)
+        _lh.addWidget(self.__txtFileName)
+        _lh.addWidget(self.__btnLoad)
+
+        _lv.addLayout(_lh)
+
+        self.__chkIgnoreDups = QCheckBox("Ignore exact duplicates")
+        _lv.addWidget(self.__chkIgnoreDups)
+
+        self.__chkDebitsOnly = QCheckBox("Bank statement signs (negative amounts are spending, credits are dropped)")
+        _lv.addWidget(self.__chkDebitsOnly)
+
+        _lhCat = QHBoxLayout()
+        self.__chkDefaultCategory = QCheckBox("Default category for rows without one:")
+        self.__cmbDefaultCategory = QComboBox()
+        self.__cmbDefaultCategory.setEnabled(False)
+        if (categories is not None):
+            self.__cmbDefaultCategory.setModel(categories)
+            self.__cmbDefaultCategory.setModelColumn(1)
+        else:
+            self.__chkDefaultCategory.setEnabled(False)
+        _lhCat.addWidget(self.__chkDefaultCategory)
+        _lhCat.addWidget(self.__cmbDefaultCategory, 10)
+        _lv.addLayout(_lhCat)
+
+        _lh2 = QHBoxLayout()
+        _lh2.addStretch(10)
+        self.__btnCancel = QPushButton("cancel")
+        self.__btnCancel.setEnabled(False)
+        self.__btnImport = QPushButton("import")
+        self.__btnImport.setEnabled(False)
+        self.__btnImport.setFixedWidth(80)
+        _lh2.addWidget(self.__btnCancel)
+        _lh2.addWidget(self.__btnImport)
+        _lv.addLayout(_lh2)
+
+        self.__progressBar = QProgressBar()
+        _lv.addWidget(self.__progressBar)
+
+        self.__lblResult = QLabel()
+        _lv.addWidget(self.__lblResult)
+
+        _lh3 = QHBoxLayout()
+        _lh3.addStretch(10)
+        self.__btnClose = QPushButton("close")
+
+        _lh3.addWidget(self.__btnClose)
+        _lv.addLayout(_lh3)
+
+        self.__progressBar.setMinimum(0)
+        self.__progressBar.setMaximum(100)
+        self.__progressBar.setValue(0)
+
+        self.__btnImport.clicked.connect(self.import_clicked)
+        self.__btnClose.clicked.connect(self.close_clicked)
+        self.__btnLoad.clicked.connect(self.load_clicked)
+        self.__txtFileName.editingFinished.connect(self.txtFilename_changed)
+        self.__txtFileName.textChanged.connect(self.txtFilename_changed)
+        self.__btnCancel.clicked.connect(self.cancel_clicked)
+        self.__chkDefaultCategory.toggled.connect(self.__cmbDefaultCategory.setEnabled)
+
+        self.__controlGroup1 = [self.__txtFileName, self.__btnImport, self.__btnLoad, self.__btnClose, self.__chkIgnoreDups,
+                                self.__chkDebitsOnly, self.__chkDefaultCategory, self.__cmbDefaultCategory]
+
+    def txtFilename_changed(self):
+        palette = QPalette()
+        palette.setColor(QPalette.Base, Qt.white)
+        palette.setColor(QPalette.Text, Qt.black)
+
+        paletteRed = QPalette()
+        paletteRed.setColor(QPalette.Base, Qt.white)
+        paletteRed.setColor(QPalette.Text, Qt.red)
+
+        fileName = self.__txtFileName.text()
+        if os.path.isfile(fileName):
+            self.__btnImport.setEnabled(True)
+            self.__txtFileName.setPalette(palette)
+        else:
+            self.__btnImport.setEnabled(False)
+            self.__txtFileName.setPalette(paletteRed)
+
+    def load_clicked(self):
+        d = QFileDialog(self)
+        fileName, type = d.getOpenFileName()
+
+        if (fileName != ""):
+            self.__txtFileName.setText(fileName)
+
+    def close_clicked(self):
+        self.close()
+
+    def tick(self, step):
+        self.__progressBar.setValue(step)
+
+    def import_clicked(self):
+        if (self.__database.isReadOnly()):
+            self.__lblResult.setText("The database profile is read-only, switch it to import data.")
+            return
+
+        for c in self.__controlGroup1:
+            c.setEnabled(False)
+        self.__btnCancel.setEnabled(True)
+        self.__lblResult.clear()
+
+        # the shared connection is switched here on the GUI thread, not by the worker
+        self.__previousProfile = self.__database.getProfile()
+        self.__database.setProfile(IMPORT_PROFILE)
+
+        self.thread = QThread()
+        self.importWorker = Importer(self.__txtFileName.text(), self.__database)
+        self.importWorker.setProfile(None)
+        if (self.__categories is not None):
+            self.importWorker.setCategories(self.__categories)
+        self.importWorker.setIgnoreDuplicates(self.__chkIgnoreDups.isChecked())
+        self.importWorker.setDebitsOnly(self.__chkDebitsOnly.isChecked())
+        self.importWorker.setDefaultCategory(self.__getDefaultCategory())
+        self.importWorker.open()
+        self.__progressBar.setMaximum(self.importWorker.getNumberOfItems()-1)
+        self.importWorker.moveToThread(self.thread)
+        self.thread.started.connect(self.importWorker.run)
+        self.importWorker.finished.connect(self.thread.quit)
+        self.importWorker.tick.connect(self.tick)
+        self.importWorker.finished.connect(self.import_done)
+        self.thread.start()
+
+    def import_done(self):
+        if (self.__previousProfile is not None):
+            self.__database.setProfile(self.__previousProfile)
+            self.__previousProfile = None
+
+        for c in self.__controlGroup1:
+            c.setEnabled(True)
+        self.__btnCancel.setEnabled(False)
+        self.__cmbDefaultCategory.setEnabled(self.__chkDefaultCategory.isChecked())
+        self.__chkDefaultCategory.setEnabled(self.__categories is not None)
+
+        w = self.importWorker
+        text = str(w.imported) + " items imported"
+        if (w.skipped > 0):
+            text += ", " + str(w.skipped) + " rows skipped because their category is unknown"
+        if (w.duplicates > 0):
+            text += ", " + str(w.duplicates) + " duplicates ignored"
+        if (w.credits > 0):
+            text += ", " + str(w.credits) + " credits dropped"
+        self.__lblResult.setText(text)
+
+    def __getDefaultCategory(self):
+        if (self.__chkDefaultCategory.isChecked() and self.__categories is not None):
+            i = self.__cmbDefaultCategory.currentIndex()
+            if (i >= 0):
+                return self.__categories.getItem(i).getId()
+        return None
+
+    def cancel_clicked(self):
+        self.importWorker.cancel()
@@ -1,14 +1,38 @@
 #!/usr/bin/python3
 
+import time
+startTime = time.perf_counter()
+
 import sys
-from PyQt5 import QtCore
+from PyQt5.QtCore import QObject, QEvent, QTimer
 from PyQt5.QtWidgets import QApplication
-from dataObjects import Importer
 
 from mainWindow import MainWindow
 
+
+class FirstPaintProbe(QObject):
+
+    def __init__(self, quitAfterPaint, parent=None):
+        super(FirstPaintProbe, self).__init__(parent)
+        self.__quitAfterPaint = quitAfterPaint
+
+    def eventFilter(self, obj, event):
+        if (event.type() == QEvent.Paint):
+            obj.removeEventFilter(self)
+            elapsed = (time.perf_counter() - startTime) * 1000
+            print("startup: first paint after %.1f ms" % elapsed, file=sys.stderr)
+            if (self.__quitAfterPaint):
+                QTimer.singleShot(0, QApplication.instance().quit)
+        return False
+
+
 app = QApplication(sys.argv)
 m = MainWindow()
+
+if ("--measure-startup" in sys.argv):
+    probe = FirstPaintProbe("--quit" in sys.argv)
+    m.installEventFilter(probe)
+
 m.show()
 
 
@@ -10,132 +10,16 @@ from PyQt5.QtWidgets import QWidget, \
     QComboBox, \
     QGroupBox, \
     QAction, QMainWindow, QMenu, QLineEdit, QPushButton, QAbstractItemView, QDialog, QFormLayout, QFileDialog, \
-    QTabWidget, QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsRectItem, QCheckBox, \
-    QSpacerItem, QSizePolicy, QProgressBar
-from PyQt5.QtCore import Qt, pyqtSignal, QModelIndex, QDate, QSettings, QThread
-from PyQt5.QtGui import QKeySequence, QValidator, QKeyEvent, QColor, QPainter, QLinearGradient, QPen, QPalette
-from dataObjects import ItemList, SpendingItem, Category, Importer, CategoryList, Database
+    QTabWidget, QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsRectItem, \
+    QSpacerItem, QSizePolicy, QErrorMessage, QActionGroup
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QSettings, QTimer
+from PyQt5.QtGui import QKeySequence, QValidator, QKeyEvent, QColor, QPainter, QLinearGradient, QPen
+from dataObjects import ItemList, SpendingItem, CategoryList, Database
+from databaseProfiles import PROFILES, DEFAULT_PROFILE
 from filterWidget import *
-from dashboardWidgets import *
+from refreshScheduler import RefreshScheduler
+from queryWorker import BackgroundItemSource
 import sys
-import os.path
-
-
-class ImportWidget(QDialog):
-    def __init__(self, database, parent=None):
-        super(ImportWidget, self).__init__(parent)
-        self.setGeometry(100, 100, 500, 200)
-        self.setWindowTitle("Import Data")
-        self.setModal(True)
-
-        self.__database = database
-
-        _lv = QVBoxLayout()
-        self.setLayout(_lv)
-
-        _lh = QHBoxLayout()
-
-        self.__lblFileName = QLabel("File name:")
-        self.__txtFileName = QLineEdit()
-        self.__btnLoad = QPushButton("load")
-
-        _lh.addWidget(self.__lblFileName)
-        _lh.addWidget(self.__txtFileName)
-        _lh.addWidget(self.__btnLoad)
-
-        _lv.addLayout(_lh)
-
-        self.__chkIgnoreDups = QCheckBox("Ignore exact duplicates")
-        _lv.addWidget(self.__chkIgnoreDups)
-
-        _lh2 = QHBoxLayout()
-        _lh2.addStretch(10)
-        self.__btnCancel = QPushButton("cancel")
-        self.__btnCancel.setEnabled(False)
-        self.__btnImport = QPushButton("import")
-        self.__btnImport.setEnabled(False)
-        self.__btnImport.setFixedWidth(80)
-        _lh2.addWidget(self.__btnCancel)
-        _lh2.addWidget(self.__btnImport)
-        _lv.addLayout(_lh2)
-
-        self.__progressBar = QProgressBar()
-        _lv.addWidget(self.__progressBar)
-
-        _lh3 = QHBoxLayout()
-        _lh3.addStretch(10)
-        self.__btnClose = QPushButton("close")
-
-        _lh3.addWidget(self.__btnClose)
-        _lv.addLayout(_lh3)
-
-        self.__progressBar.setMinimum(0)
-        self.__progressBar.setMaximum(100)
-        self.__progressBar.setValue(0)
-
-        self.__btnImport.clicked.connect(self.import_clicked)
-        self.__btnClose.clicked.connect(self.close_clicked)
-        self.__btnLoad.clicked.connect(self.load_clicked)
-        self.__txtFileName.editingFinished.connect(self.txtFilename_changed)
-        self.__txtFileName.textChanged.connect(self.txtFilename_changed)
-        self.__btnCancel.clicked.connect(self.cancel_clicked)
-
-        self.__controlGroup1 = [self.__txtFileName, self.__btnImport, self.__btnLoad, self.__btnClose, self.__chkIgnoreDups]
-
-    def txtFilename_changed(self):
-        palette = QPalette()
-        palette.setColor(QPalette.Base, Qt.white)
-        palette.setColor(QPalette.Text, Qt.black)
-
-        paletteRed = QPalette()
-        paletteRed.setColor(QPalette.Base, Qt.white)
-        paletteRed.setColor(QPalette.Text, Qt.red)
-
-        fileName = self.__txtFileName.text()
-        if os.path.isfile(fileName):
-            self.__btnImport.setEnabled(True)
-            self.__txtFileName.setPalette(palette)
-        else:
-            self.__btnImport.setEnabled(False)
-            self.__txtFileName.setPalette(paletteRed)
-
-    def load_clicked(self):
-        d = QFileDialog(self)
-        fileName, type = d.getOpenFileName()
-
-        if (fileName != ""):
-            self.__txtFileName.setText(fileName)
-
-    def close_clicked(self):
-        self.close()
-
-    def tick(self, step):
-        self.__progressBar.setValue(step)
-
-    def import_clicked(self):
-        for c in self.__controlGroup1:
-            c.setEnabled(False)
-        self.__btnCancel.setEnabled(True)
-
-        self.thread = QThread()
-        self.importWorker = Importer(self.__txtFileName.text(), self.__database)
-        self.importWorker.open()
-        self.__progressBar.setMaximum(self.importWorker.getNumberOfItems()-1)
-        self.importWorker.moveToThread(self.thread)
-        self.thread.started.connect(self.importWorker.run)
-        self.importWorker.finished.connect(self.thread.quit)
-        self.importWorker.tick.connect(self.tick)
-        self.importWorker.finished.connect(self.import_done)
-        self.thread.start()
-
-    def import_done(self):
-        for c in self.__controlGroup1:
-            c.setEnabled(True)
-        self.__btnCancel.setEnabled(False)
-        self.__database.databaseChanged.emit()
-
-    def cancel_clicked(self):
-        self.importWorker.cancel()
 
 
 class SpendingItemWidget(QDialog):
@@ -204,7 +88,7 @@ class SpendingItemWidget(QDialog):
     def editSpendingItem(self, item: SpendingItem):
         self.__dtDate.setDate(item.getDate())
         self.__txtCost.setText(str(item.getCost()) + " €")
-        self.__cbxCategory.setCurrentText(item.getCategory())
+        self.__cbxCategory.setCurrentIndex(self.__categoryList.findRowIndexOfCategoryId(item.getCategoryId()))
         self.__txtComment.setText(item.getComment())
         result = self.exec()
         if (result == QDialog.Accepted):
@@ -254,16 +138,22 @@ class MainWindow(QMainWindow):
 
         self.__itemList = ItemList()
         self.__catList = CategoryList()
+        self.__itemList.setCategories(self.__catList)
+        self.__itemSource = BackgroundItemSource(self.database, self)
         self.__tabView = QTabWidget()
 
         self.view = MyTableView()
         self.view.setModel(self.__itemList)
         self.view.verticalHeader().setVisible(False)
+        self.view.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.view.setSortingEnabled(True)
 
-        self.__dashboard = DashboardWidget(self.database)
+        self.__dashboard = None
+        self.__diagnostics = None
 
         self.__tabView.addTab(self.view, "Expenses")
-        self.__tabView.addTab(self.__dashboard, "Dashboard")
+        self.__tabView.addTab(QWidget(), "Dashboard")
+        self.__tabView.currentChanged.connect(self.tabChanged)
 
         #TODO: use the proper constant instead of 1 here
         self.view.setSelectionBehavior(1)
@@ -298,15 +188,66 @@ class MainWindow(QMainWindow):
 
         self.view.enterPressed.connect(self.__actionEditSpendingItem.trigger)
         self.database.databaseChanged.connect(self.databaseChanged)
-        self.database.databaseChanged.connect(self.refresh)
-        self.database.filtersChanged.connect(self.refresh)
-
-        self.loadSettings()
+        self.database.profileChanged.connect(lambda name: self.databaseChanged())
+        self.database.itemInserted.connect(self.itemChanged)
+        self.database.itemUpdated.connect(self.itemChanged)
+        self.database.itemsDeleted.connect(self.__itemList.removeIds)
+        self.__itemList.sortChanged.connect(self.database.setSort)
+        self.database.errorOccurred.connect(self.showError)
+
+        self.__scheduler = RefreshScheduler(parent=self)
+        self.__scheduler.addConsumer("items", self.refreshItems)
+        self.__scheduler.addConsumer("categories", self.refreshCategories)
+        self.__scheduler.addConsumer("dashboard", self.refreshDashboard)
+        self.__scheduler.watch(self.database.databaseChanged, "items", "dashboard")
+        self.__scheduler.watch(self.database.itemInserted, "dashboard")
+        self.__scheduler.watch(self.database.itemUpdated, "dashboard")
+        self.__scheduler.watch(self.database.itemsDeleted, "dashboard")
+        self.__scheduler.watch(self.database.filtersChanged, "items")
+        self.__scheduler.watch(self.database.categoriesChanged, "categories")
+
+        QTimer.singleShot(0, self.loadSettings)
+
+    def tabChanged(self, index):
+        if (index == 1 and self.__dashboard is None):
+            from dashboardWidgets import DashboardWidget
+            self.__dashboard = DashboardWidget(self.database)
+            placeholder = self.__tabView.widget(1)
+            self.__tabView.blockSignals(True)
+            self.__tabView.removeTab(1)
+            placeholder.deleteLater()
+            self.__tabView.insertTab(1, self.__dashboard, "Dashboard")
+            self.__tabView.setCurrentIndex(1)
+            self.__tabView.blockSignals(False)
+
+    def diagnostics(self):
+        from diagnostics import queryLog
+        enabled = self.__actionDiagnostics.isChecked()
+        queryLog.setEnabled(enabled)
+
+        if (enabled):
+            if (self.__diagnostics is None):
+                from diagnosticsWidget import DiagnosticsWidget
+                self.__diagnostics = DiagnosticsWidget()
+            self.__tabView.addTab(self.__diagnostics, "Diagnostics")
+            self.__tabView.setCurrentWidget(self.__diagnostics)
+        elif (self.__diagnostics is not None):
+            self.__tabView.removeTab(self.__tabView.indexOf(self.__diagnostics))
+
+    def refreshDashboard(self):
+        if (self.__dashboard is not None):
+            self.__dashboard.refresh()
 
     def refresh(self):
-        self.__itemList.clear()
-        self.database.getSpendingItems(self.__itemList)
-        self.__catList.clear()
+        self.__scheduler.markAllDirty()
+
+    def itemChanged(self, id):
+        self.__itemList.patchItem(id, self.database.getFilteredItem(id))
+
+    def refreshItems(self):
+        self.__itemSource.load(self.__itemList)
+
+    def refreshCategories(self):
         self.database.getCategories(self.__catList)
 
     def searchChanged(self):
@@ -331,6 +272,8 @@ class MainWindow(QMainWindow):
 
     def selectionChanged(self, selected, deselected):
         rows = self.__selectedRows(self.view.selectedIndexes())
+        if (self.database.isReadOnly()):
+            rows = []
 
         if (len(rows) <= 0):
             self.__actionDeleteSpendingItem.setEnabled(False)
@@ -374,6 +317,19 @@ class MainWindow(QMainWindow):
         self.__actionImport.triggered.connect(self.importData)
 
         self.__actionExport = QAction("&Export")
+        self.__actionExport.triggered.connect(self.exportData)
+
+        self.__actionRebuildTotals = QAction("Rebuild Monthly Totals")
+        self.__actionRebuildTotals.triggered.connect(self.database.rebuildMonthlyTotals)
+
+        self.__profileActions = QActionGroup(self)
+        self.__profileActions.setExclusive(True)
+        for name, profile in PROFILES.items():
+            action = QAction(name, self.__profileActions)
+            action.setCheckable(True)
+            action.setStatusTip(profile.getDescription())
+            action.setData(name)
+        self.__profileActions.triggered.connect(self.profileChanged)
 
         self.__actionSearch = QAction("Search")
         self.__actionSearch.triggered.connect(self.search)
@@ -390,11 +346,19 @@ class MainWindow(QMainWindow):
         self.__actionVerticalHeader.setShortcut("Ctrl+L")
         self.__actionVerticalHeader.setCheckable(True)
 
+        self.__actionDiagnostics = QAction("Diagnostics")
+        self.__actionDiagnostics.triggered.connect(self.diagnostics)
+        self.__actionDiagnostics.setShortcut("Ctrl+Shift+D")
+        self.__actionDiagnostics.setCheckable(True)
+
     def initMenu(self):
         self.__fileMenu: QMenu = self.menuBar().addMenu("&File")
         self.__fileMenu.addAction(self.__actionOpenDatabase)
         self.__fileMenu.addAction(self.__actionImport)
         self.__fileMenu.addAction(self.__actionExport)
+        self.__fileMenu.addAction(self.__actionRebuildTotals)
+        self.__profileMenu: QMenu = self.__fileMenu.addMenu("Database Profile")
+        self.__profileMenu.addActions(self.__profileActions.actions())
         self.__fileMenu.addAction(self.__actionQuit)
 
         self.__editMenu: QMenu = self.menuBar().addMenu("&Edit")
@@ -406,6 +370,7 @@ class MainWindow(QMainWindow):
         self.__viewMenu.addAction(self.__actionSearch)
         self.__viewMenu.addAction(self.__actionFilter)
         self.__viewMenu.addAction(self.__actionVerticalHeader)
+        self.__viewMenu.addAction(self.__actionDiagnostics)
 
     def initToolbar(self):
         self.toolbar = self.addToolBar('Functions')
@@ -422,11 +387,15 @@ class MainWindow(QMainWindow):
             self.__itemList.clear()
             self.__catList.clear()
             self.database.openDatabase(fileName)
-            self.database.getSpendingItems(self.__itemList)
-            self.database.getCategories(self.__catList)
 
     def importData(self):
-        dialog = ImportWidget(self.database, self)
+        from importWidget import ImportWidget
+        dialog = ImportWidget(self.database, self.__catList, self)
+        dialog.show()
+
+    def exportData(self):
+        from exportWidget import ExportWidget
+        dialog = ExportWidget(self.database, self)
         dialog.show()
 
     def edit(self):
@@ -461,6 +430,7 @@ class MainWindow(QMainWindow):
             self.__search.setFocus()
 
     def exit(self):
+        self.__itemSource.stop()
         self.database.close()
         self.saveSettings()
         sys.exit(0)
@@ -481,17 +451,19 @@ class MainWindow(QMainWindow):
                 itemIdsToDelete.append(item.getId())
 
         self.database.deleteListOfSpendingItems(itemIdsToDelete)
-        self.refresh()
         self.view.selectionModel().clear()
 
     def databaseChanged(self):
         if self.database.isOpen():
-            self.__actionAddSpendingItem.setEnabled(True)
+            writable = not self.database.isReadOnly()
+            self.__actionAddSpendingItem.setEnabled(writable)
             self.__filter.setEnabled(True)
             self.__search.setEnabled(True)
             self.view.setEnabled(True)
-            self.__actionImport.setEnabled(True)
+            self.__actionImport.setEnabled(writable)
             self.__actionExport.setEnabled(True)
+            self.__actionRebuildTotals.setEnabled(writable)
+            self.selectionChanged(None, None)
         else:
             self.__actionAddSpendingItem.setEnabled(False)
             self.__filter.setEnabled(False)
@@ -501,12 +473,28 @@ class MainWindow(QMainWindow):
             self.view.setEnabled(False)
             self.__actionImport.setEnabled(False)
             self.__actionExport.setEnabled(False)
+            self.__actionRebuildTotals.setEnabled(False)
+
+    def showError(self, message):
+        self.__errorMessage = QErrorMessage(self)
+        self.__errorMessage.showMessage(message)
+
+    def profileChanged(self, action):
+        self.database.setProfile(action.data())
 
     def loadSettings(self):
+        profile = self.__settings.value("databaseProfile", DEFAULT_PROFILE)
+        if (not self.database.setProfile(profile)):
+            profile = DEFAULT_PROFILE
+            self.database.setProfile(profile)
+        for action in self.__profileActions.actions():
+            action.setChecked(action.data() == profile)
+
         fileName = self.__settings.value("databaseFile")
         if (fileName != ""):
             self.database.openDatabase(fileName)
 
     def saveSettings(self):
         self.__settings.setValue("databaseFile", self.database.getFileName())
+        self.__settings.setValue("databaseProfile", self.database.getProfile())
         self.__settings.sync()
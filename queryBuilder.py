@@ -0,0 +1,229 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtSql import QSqlDatabase
+from databaseSchema import fullTextMatchExpression
+from diagnostics import queryLog
+
+
+class SpendingItemFilter:
+
+    def __init__(self):
+        self.__dateMin = None
+        self.__dateMax = None
+        self.__costMin = None
+        self.__costMax = None
+        self.__categoryId = None
+        self.__comment = None
+        self.__sortColumn = "date"
+        self.__sortDescending = True
+
+    def copy(self):
+        f = SpendingItemFilter()
+        f.setDateRange(self.__dateMin, self.__dateMax)
+        f.setCostRange(self.__costMin, self.__costMax)
+        f.setCategory(self.__categoryId)
+        f.setComment(self.__comment)
+        f.setSort(self.__sortColumn, self.__sortDescending)
+        return f
+
+    def setSort(self, column: str, descending: bool):
+        self.__sortColumn = column
+        self.__sortDescending = descending
+
+    def setDateRange(self, min, max):
+        self.__dateMin = min
+        self.__dateMax = max
+
+    def setCostRange(self, min, max):
+        self.__costMin = min
+        self.__costMax = max
+
+    def setCategory(self, id):
+        self.__categoryId = id
+
+    def setComment(self, c):
+        self.__comment = c
+
+    def getDateMin(self):
+        return self.__dateMin
+
+    def getDateMax(self):
+        return self.__dateMax
+
+    def getCostMin(self):
+        return self.__costMin
+
+    def getCostMax(self):
+        return self.__costMax
+
+    def getCategory(self):
+        return self.__categoryId
+
+    def getComment(self):
+        return self.__comment
+
+    def getSortColumn(self):
+        return self.__sortColumn
+
+    def isSortDescending(self):
+        return self.__sortDescending
+
+
+class SpendingItemQueryBuilder:
+    SELECT = "SELECT s.id as id, s.date as date, s.cost as cost, c.name as catName, s.comment as comment, " \
+             "s.categoryId as catId " \
+             "FROM spendingItem as s, category as c WHERE c.id = s.categoryId"
+    COUNT = "SELECT COUNT(*) FROM spendingItem as s, category as c WHERE c.id = s.categoryId"
+    SORT_KEYS = {
+        "date": ["s.date", "s.id"],
+        "cost": ["s.cost", "s.id"],
+        "category": ["c.name", "c.id", "s.id"],
+        "comment": ["s.comment", "s.id"]}
+
+    def __init__(self, fullText=False):
+        self.__fullText = fullText
+
+    def setFullText(self, fullText: bool):
+        self.__fullText = fullText
+
+    def buildWhere(self, f: SpendingItemFilter):
+        clauses = []
+        params = {}
+
+        if (f.getCostMin() != None):
+            clauses.append("s.cost >= :costMin")
+            params[":costMin"] = f.getCostMin()
+
+        if (f.getCostMax() != None):
+            clauses.append("s.cost <= :costMax")
+            params[":costMax"] = f.getCostMax()
+
+        if (f.getDateMin() != None):
+            clauses.append("s.date >= :dateMin")
+            params[":dateMin"] = f.getDateMin().toString(Qt.ISODate)
+
+        if (f.getDateMax() != None):
+            clauses.append("s.date <= :dateMax")
+            params[":dateMax"] = f.getDateMax().toString(Qt.ISODate)
+
+        if (f.getCategory() != None):
+            clauses.append("s.categoryId = :categoryId")
+            params[":categoryId"] = f.getCategory()
+
+        if (f.getComment() != None and self.__fullText):
+            match = fullTextMatchExpression(f.getComment())
+            if (match != ""):
+                clauses.append("s.id IN (SELECT rowid FROM spendingItemFts WHERE spendingItemFts MATCH :match)")
+                params[":match"] = match
+        elif (f.getComment() != None):
+            clauses.append("s.comment LIKE :comment ESCAPE '\\'")
+            params[":comment"] = "%" + self.__escapeLike(f.getComment()) + "%"
+
+        return "".join(" AND " + c for c in clauses), params
+
+    def pageKey(self, f: SpendingItemFilter, id: int, isoDate: str, cost: float, category: str, categoryId: int,
+                comment: str):
+        column = f.getSortColumn()
+        if (column == "cost"):
+            return (cost, id)
+        elif (column == "category"):
+            return (category, categoryId, id)
+        elif (column == "comment"):
+            return (comment, id)
+        return (isoDate, id)
+
+    def itemPageKey(self, f: SpendingItemFilter, item):
+        if (item is None):
+            return None
+        return self.pageKey(f, item.getId(), item.getRawDate(), item.getCost(), item.getCategory(),
+                            item.getCategoryId(), item.getComment())
+
+    def buildPage(self, f: SpendingItemFilter, after=None, limit=None):
+        where, params = self.buildWhere(f)
+
+        keys = self.SORT_KEYS.get(f.getSortColumn(), self.SORT_KEYS["date"])
+        descending = f.isSortDescending()
+        order = " ORDER BY " + ", ".join(k + (" DESC" if descending else " ASC") for k in keys)
+
+        limitClause = ""
+        if (limit != None):
+            limitClause = " LIMIT :limit"
+            params[":limit"] = limit
+
+        if (after == None):
+            return self.SELECT + where + order + limitClause + ";", params
+
+        names = [":after" + str(i) for i in range(len(keys))]
+        for name, value in zip(names, after):
+            if (value is not None):
+                params[name] = value
+        operator = " < " if descending else " > "
+
+        # NULL never compares, so the NULL rows, which sort before every value, get their own index range
+        if (after[0] is None):
+            conditions = [keys[0] + " IS NULL AND (" + ", ".join(keys[1:]) + ")" + operator + "(" + ", ".join(names[1:]) + ")"]
+            if (not descending):
+                conditions.append(keys[0] + " IS NOT NULL")
+        else:
+            conditions = ["(" + ", ".join(keys) + ")" + operator + "(" + ", ".join(names) + ")"]
+            if (descending):
+                conditions.append(keys[0] + " IS NULL")
+
+        if (len(conditions) == 1):
+            return self.SELECT + where + " AND " + conditions[0] + order + limitClause + ";", params
+
+        parts = ["SELECT * FROM (" + self.SELECT + where + " AND " + c + order + limitClause + ")" for c in conditions]
+        return " UNION ALL ".join(parts) + limitClause + ";", params
+
+    def buildItem(self, f: SpendingItemFilter, id: int):
+        where, params = self.buildWhere(f)
+        params[":id"] = id
+        return self.SELECT + where + " AND s.id = :id;", params
+
+    def buildCount(self, f: SpendingItemFilter):
+        where, params = self.buildWhere(f)
+        return self.COUNT + where + ";", params
+
+    def __escapeLike(self, text: str):
+        return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class PreparedQueryCache:
+
+    def __init__(self, connection: QSqlDatabase, maxSize=32):
+        self.__db = connection
+        self.__maxSize = maxSize
+        self.__queries = OrderedDict()
+
+    def get(self, sql: str, params=None):
+        query = self.__queries.get(sql)
+        if (query is not None and not queryLog.isCurrent(query)):
+            query.finish()
+            query = None
+        if (query is None):
+            query = queryLog.newQuery(self.__db)
+            query.setForwardOnly(True)
+            if (not query.prepare(sql)):
+                print(query.lastError().text())
+                return None
+            self.__queries[sql] = query
+            self.__queries.move_to_end(sql)
+            if (len(self.__queries) > self.__maxSize):
+                self.__queries.popitem(last=False)
+        else:
+            query.finish()
+            self.__queries.move_to_end(sql)
+
+        if (params):
+            for name, value in params.items():
+                query.bindValue(name, value)
+        return query
+
+    def clear(self):
+        for query in self.__queries.values():
+            query.finish()
+        self.__queries.clear()
+
+    def size(self):
+        return len(self.__queries)
@@ -0,0 +1,161 @@
+import itertools
+
+from PyQt5.QtCore import QObject, QThread, QCoreApplication, QMetaObject, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtSql import QSqlDatabase
+from dataObjects import SpendingItemStore
+from databaseSchema import hasTable
+from diagnostics import queryLog, instrumented
+from queryBuilder import SpendingItemQueryBuilder, PreparedQueryCache
+
+
+class QueryWorker(QObject):
+    batchReady = pyqtSignal(int, object)
+    finished = pyqtSignal(int, bool)
+
+    BATCH_SIZE = 100
+
+    __connectionIds = itertools.count()
+
+    def __init__(self, parent=None):
+        super(QueryWorker, self).__init__(parent)
+
+        self.__connectionName = "queryWorker" + str(next(self.__connectionIds))
+        self.__fileName = None
+        self.__db = None
+        self.__queryCache = None
+        self.__queryBuilder = SpendingItemQueryBuilder()
+        self.__activeRequest = 0
+
+    def setActiveRequest(self, requestId: int):
+        self.__activeRequest = requestId
+
+    def isCancelled(self, requestId: int):
+        return requestId != self.__activeRequest
+
+    def __open(self, fileName: str):
+        if (self.__db is not None and self.__fileName == fileName and self.__db.isOpen()):
+            return True
+
+        self.close()
+
+        self.__db = QSqlDatabase.addDatabase("QSQLITE", self.__connectionName)
+        self.__db.setConnectOptions("QSQLITE_BUSY_TIMEOUT=5000")
+        self.__db.setDatabaseName(fileName)
+        if (not self.__db.open()):
+            return False
+
+        self.__fileName = fileName
+        self.__queryCache = PreparedQueryCache(self.__db)
+        self.__queryBuilder.setFullText(hasTable(self.__db, "spendingItemFts"))
+        return True
+
+    @pyqtSlot()
+    def close(self):
+        if (self.__db is None):
+            return
+
+        self.__queryCache.clear()
+        self.__queryCache = None
+        self.__db.close()
+        self.__db = None
+        QSqlDatabase.removeDatabase(self.__connectionName)
+
+    @pyqtSlot(int, str, object, object, int, str)
+    @instrumented
+    def runPage(self, requestId, fileName, filter, afterKey, limit, trigger=""):
+        if (self.isCancelled(requestId)):
+            return
+
+        queryLog.setTrigger(trigger)
+
+        if (not self.__open(fileName)):
+            self.finished.emit(requestId, False)
+            return
+
+        sql, params = self.__queryBuilder.buildPage(filter, afterKey, limit)
+        query = self.__queryCache.get(sql, params)
+        if (query is None or not query.exec()):
+            self.finished.emit(requestId, False)
+            return
+
+        count = 0
+        batch = SpendingItemStore()
+        while (query.next()):
+            batch.appendQuery(query)
+            count += 1
+            if (len(batch) >= self.BATCH_SIZE):
+                if (self.isCancelled(requestId)):
+                    query.finish()
+                    return
+                self.batchReady.emit(requestId, batch)
+                batch = SpendingItemStore()
+        query.finish()
+
+        if (len(batch) > 0):
+            self.batchReady.emit(requestId, batch)
+        self.finished.emit(requestId, count >= limit)
+
+
+class BackgroundItemSource(QObject):
+    pageRequested = pyqtSignal(int, str, object, object, int, str)
+
+    def __init__(self, database, parent=None):
+        super(BackgroundItemSource, self).__init__(parent)
+
+        self.__database = database
+        self.__itemList = None
+        self.__filter = None
+        self.__fileName = ""
+        self.__trigger = ""
+        self.__requestId = 0
+
+        self.__thread = QThread()
+        self.__worker = QueryWorker()
+        self.__worker.moveToThread(self.__thread)
+        self.pageRequested.connect(self.__worker.runPage)
+        self.__worker.batchReady.connect(self.batchReady)
+        self.__worker.finished.connect(self.finished)
+        self.__thread.start()
+
+        QCoreApplication.instance().aboutToQuit.connect(self.stop)
+
+    def load(self, itemList):
+        self.cancel()
+        self.__filter = self.__database.getFilter()
+        self.__fileName = self.__database.getFileName()
+        self.__itemList = itemList
+        self.__trigger = queryLog.getTrigger()
+        itemList.setSource(self)
+        self.__trigger = "fetchMore"
+
+    def cancel(self):
+        self.__requestId += 1
+        self.__worker.setActiveRequest(self.__requestId)
+
+    def fetchPage(self, itemList, after, limit):
+        if (itemList is not self.__itemList or not self.__database.isOpen()):
+            itemList.pageFinished(False)
+            return
+
+        afterKey = self.__database.getQueryBuilder().itemPageKey(self.__filter, after)
+
+        self.__requestId += 1
+        self.__worker.setActiveRequest(self.__requestId)
+        self.pageRequested.emit(self.__requestId, self.__fileName, self.__filter, afterKey, limit, self.__trigger)
+
+    def batchReady(self, requestId, items):
+        if (requestId == self.__requestId and self.__itemList is not None):
+            self.__itemList.receiveBatch(items)
+
+    def finished(self, requestId, hasMore):
+        if (requestId == self.__requestId and self.__itemList is not None):
+            self.__itemList.pageFinished(hasMore)
+
+    def stop(self):
+        if (not self.__thread.isRunning()):
+            return
+
+        self.cancel()
+        QMetaObject.invokeMethod(self.__worker, "close", Qt.BlockingQueuedConnection)
+        self.__thread.quit()
+        self.__thread.wait()
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QTimer
+from diagnostics import queryLog
+
+
+class RefreshScheduler(QObject):
+
+    def __init__(self, interval=0, parent=None):
+        super(RefreshScheduler, self).__init__(parent)
+
+        self.__consumers = OrderedDict()
+        self.__dirty = {}
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(interval)
+        self.__timer.timeout.connect(self.flush)
+
+    def addConsumer(self, name: str, callback):
+        self.__consumers[name] = callback
+
+    def watch(self, signal, *names):
+        reason = signal.signal[1:].split("(")[0]
+        if (len(names) == 0):
+            signal.connect(lambda *args: self.markAllDirty(reason=reason))
+        else:
+            signal.connect(lambda *args: self.markDirty(*names, reason=reason))
+
+    def markDirty(self, *names, reason=""):
+        for name in names:
+            if (name in self.__consumers):
+                self.__dirty.setdefault(name, set()).add(reason)
+
+        if (len(self.__dirty) > 0 and not self.__timer.isActive()):
+            self.__timer.start()
+
+    def markAllDirty(self, reason=""):
+        self.markDirty(*self.__consumers.keys(), reason=reason)
+
+    def isDirty(self, name: str):
+        return name in self.__dirty
+
+    def flush(self):
+        self.__timer.stop()
+
+        for name, callback in self.__consumers.items():
+            if (name in self.__dirty):
+                reasons = self.__dirty.pop(name)
+                previous = queryLog.setTrigger(", ".join(sorted(r for r in reasons if r)))
+                try:
+                    callback()
+                finally:
+                    queryLog.setTrigger(previous)
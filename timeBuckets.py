@@ -0,0 +1,98 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from PyQt5.QtCore import QDate
+
+
+BUCKET_LEVELS = ["day", "week", "month", "quarter", "year"]
+
+
+def bucketStart(d: date, level: str):
+    if (level == "week"):
+        return d - timedelta(days=d.weekday())
+    elif (level == "month"):
+        return date(d.year, d.month, 1)
+    elif (level == "quarter"):
+        return date(d.year, 3 * ((d.month - 1) // 3) + 1, 1)
+    elif (level == "year"):
+        return date(d.year, 1, 1)
+    return d
+
+
+def nextBucket(d: date, level: str):
+    if (level == "week"):
+        return d + timedelta(days=7)
+    elif (level == "month" or level == "quarter"):
+        months = d.month - 1 + (3 if level == "quarter" else 1)
+        return date(d.year + months // 12, months % 12 + 1, 1)
+    elif (level == "year"):
+        return date(d.year + 1, 1, 1)
+    return d + timedelta(days=1)
+
+
+def bucketEnd(d: date, level: str):
+    return nextBucket(d, level) - timedelta(days=1)
+
+
+def toDate(d: QDate):
+    return date(d.year(), d.month(), d.day())
+
+
+def toQDate(d: date):
+    return QDate(d.year, d.month, d.day)
+
+
+class BucketSeries:
+
+    def __init__(self, level: str, totals=None):
+        self.__level = level
+        self.__starts = []
+        self.__totals = []
+
+        if (totals):
+            first = min(totals)
+            last = max(totals)
+            d = first
+            while (d <= last):
+                self.__starts.append(d.toordinal())
+                self.__totals.append(totals.get(d, 0.0))
+                d = nextBucket(d, level)
+
+    def __len__(self):
+        return len(self.__starts)
+
+    def getLevel(self):
+        return self.__level
+
+    def setTotals(self, totals):
+        outside = {}
+        for d, total in totals.items():
+            o = bucketStart(d, self.__level).toordinal()
+            i = bisect_left(self.__starts, o)
+            if (i < len(self.__starts) and self.__starts[i] == o):
+                self.__totals[i] = total
+            else:
+                outside[bucketStart(d, self.__level)] = total
+
+        # a bucket before the first or after the last one widens the range, so the series is rebuilt
+        if (outside):
+            for o, total in zip(self.__starts, self.__totals):
+                outside.setdefault(date.fromordinal(o), total)
+            self.__init__(self.__level, outside)
+
+    def regroup(self, level: str):
+        totals = {}
+        for o, total in zip(self.__starts, self.__totals):
+            key = bucketStart(date.fromordinal(o), level)
+            totals[key] = totals.get(key, 0.0) + total
+        return BucketSeries(level, totals)
+
+    def getEntries(self, dateMin=None, dateMax=None):
+        first = 0
+        last = len(self.__starts)
+        if (dateMin is not None):
+            first = bisect_left(self.__starts, bucketStart(toDate(dateMin), self.__level).toordinal())
+        if (dateMax is not None):
+            last = bisect_right(self.__starts, toDate(dateMax).toordinal())
+
+        return [[toQDate(date.fromordinal(self.__starts[i])), self.__totals[i]] for i in range(first, last)]